@@ -1,21 +1,355 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
+from models.agent.registry import agent_types
 from models.episode import Episode
-import sys
+from models.evaluation import SequentialEvaluation
+from models.instrumentation import Instrumentation
+from models.trace import TraceRecorder, TraceWriter
+from models.world_corpus import WorldCorpus
+
+
+REPORT_FIELDS = ['agent', 'episodes', 'mean_score', 'median_score', 'stdev_score',
+                 'win_rate', 'death_rate', 'mean_steps', 'episodes_per_second']
+
+
+# Corpora opened in this worker process, by path
+_corpora = {}
+
+
+def open_corpus(path):
+    if path not in _corpora:
+        _corpora[path] = WorldCorpus(path)
+    return _corpora[path]
+
+
+def run_episodes(agent, count, seed, world=(4, 4, 0.2), corpus=None, start=0, profile=False,
+                 agent_params=None, trace=False):
+    """
+    Run count headless episodes in a worker process, each seeded from seed.
+    world is (width, height, pit_proba). With corpus, the path of a world
+    corpus, the episodes play its worlds from index start instead.
+    agent_params are the parameters of the agent factory.
+
+    Returns (results, timings, records), timings being the raw durations,
+    counters and episode summaries of the instrumentation if profile is
+    set, records the (steps, episodes) trace records if trace is set, None
+    otherwise
+    """
+    seeds = np.random.SeedSequence(seed).spawn(count)
+
+    recorder = None
+    if trace:
+        height, width = (open_corpus(corpus).height, open_corpus(corpus).width) if corpus \
+            else (world[1], world[0])
+        recorder = TraceRecorder(height=height, width=width)
+
+    instrumentation = Instrumentation() if profile else None
+    if profile:
+        instrumentation.enable()
+
+    results = []
+    try:
+        for i, episode_seed in enumerate(seeds):
+            if corpus:
+                worlds = open_corpus(corpus)
+                episode = Episode(False, pit_proba=worlds.pit_prob, seed=episode_seed,
+                                  layout=worlds[start + i])
+            else:
+                episode = Episode(False, *world, seed=episode_seed)
+            result = episode.play(agent, recorder, agent_params=agent_params)
+            if profile:
+                instrumentation.end_episode(score=result.score, steps=result.steps,
+                                            outcome=result.outcome)
+            results.append({
+                'score': result.score,
+                'steps': result.steps,
+                'won': result.outcome == 'exited' and result.gold_grabbed,
+                'died': result.outcome == 'died',
+            })
+    finally:
+        if profile:
+            instrumentation.disable()
+
+    records = recorder.take() if trace else None
+    if not profile:
+        return results, None, records
+    return results, (dict(instrumentation.durations), dict(instrumentation.counters),
+                     instrumentation.episodes), records
+
+
+def summarize(agent, results, elapsed):
+    scores = [r['score'] for r in results]
+    return {
+        'agent': agent,
+        'episodes': len(results),
+        'mean_score': statistics.mean(scores),
+        'median_score': statistics.median(scores),
+        'stdev_score': statistics.stdev(scores) if len(scores) > 1 else 0.0,
+        'win_rate': sum(r['won'] for r in results) / len(results),
+        'death_rate': sum(r['died'] for r in results) / len(results),
+        'mean_steps': statistics.mean(r['steps'] for r in results),
+        'episodes_per_second': len(results) / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def run_chunks(agent, count, executor, seed_seq, chunk_size, world, corpus=None, profile=None,
+               agent_params=None, trace=None, offset=0):
+    """
+    Split count episodes into chunks, each with its own seed spawned from
+    seed_seq, and run them on the executor. Corpus worlds are played from
+    index offset. Timings are merged into the profile Instrumentation if
+    given, episode traces written to the trace TraceWriter if given.
+
+    Returns the results in the order of the chunks
+    """
+    starts = range(0, count, chunk_size)
+    chunks = [min(chunk_size, count - i) for i in starts]
+    seeds = [int(s.generate_state(1)[0]) for s in seed_seq.spawn(len(chunks))]
+
+    futures = [executor.submit(run_episodes, agent, n, s, world, corpus, offset + i,
+                               profile is not None, agent_params, trace is not None)
+               for n, s, i in zip(chunks, seeds, starts)]
+    results = []
+    for future in futures:
+        chunk_results, timings, records = future.result()
+        results.extend(chunk_results)
+        if timings:
+            profile.merge(*timings)
+        if records:
+            trace.write(*records)
+    return results
 
 
-def main(agent, count) -> int:
-    score = 0
-    for _ in range(count):
-        print("New episode...")
-        episode = Episode(False)
-        score += episode.run(agent)
+def benchmark(agent, count, executor, seed_seq, chunk_size, world, corpus=None, profile=None,
+              agent_params=None, trace=None):
+    """
+    Run count episodes on the executor, see run_chunks, and summarize them
+    """
+    start = time.perf_counter()
+    results = run_chunks(agent, count, executor, seed_seq, chunk_size, world, corpus, profile,
+                         agent_params, trace)
+    return summarize(agent, results, time.perf_counter() - start)
 
-        print("Episode finished.\n\n")
 
+def evaluate(agents, executor, seed, chunk_size, world, evaluation, corpus=None, profiles=None,
+             agent_params=None, trace=None):
+    """
+    Run batches of episodes of every agent until the SequentialEvaluation
+    stops them. Batch b of every agent is seeded from spawn key (b,) of
+    seed, so all agents play the same worlds.
+
+    Returns the report rows, with the interval bounds, and the stop reason
+    """
+    entropy = np.random.SeedSequence(seed).entropy
+    results = {agent: [] for agent in agents}
+    elapsed = dict.fromkeys(agents, 0.0)
+
+    batch = 0
+    reason = None
+    while reason is None:
+        count = evaluation.next_batch()
+        offset = evaluation.episodes()
+        for agent in agents:
+            start = time.perf_counter()
+            batch_results = run_chunks(
+                agent, count, executor, np.random.SeedSequence(entropy, spawn_key=(batch,)),
+                chunk_size, world, corpus, profiles.get(agent) if profiles else None,
+                agent_params.get(agent) if agent_params else None, trace, offset)
+            elapsed[agent] += time.perf_counter() - start
+            results[agent].extend(batch_results)
+            evaluation.add(agent, batch_results)
+        batch += 1
+        reason = evaluation.stop_reason()
+
+    report = []
+    for agent in agents:
+        row = summarize(agent, results[agent], elapsed[agent])
+        for name, (_, low, high) in evaluation.intervals(agent).items():
+            row[f'{name}_ci_low'] = low
+            row[f'{name}_ci_high'] = high
+        report.append(row)
+    return report, reason
+
+
+def write_json(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def write_csv(report, path):
+    with open(path, 'w', newline='') as f:
+        fields = REPORT_FIELDS + [name for name in report[0] if name not in REPORT_FIELDS]
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(report)
+
+
+def print_report(report):
     print("================================")
-    print(f"score: {score}")
+    for row in report:
+        print(f"{row['agent']}: {row['episodes']} episodes, "
+              f"{row['episodes_per_second']:.1f} episodes/s")
+        print(f"  score mean {row['mean_score']:.2f} median {row['median_score']:.1f} "
+              f"stdev {row['stdev_score']:.2f}")
+        print(f"  win rate {row['win_rate']:.3f} death rate {row['death_rate']:.3f} "
+              f"steps {row['mean_steps']:.1f}")
+        if 'score_ci_low' in row:
+            print(f"  intervals: score [{row['score_ci_low']:.2f}, {row['score_ci_high']:.2f}] "
+                  f"win rate [{row['win_rate_ci_low']:.3f}, {row['win_rate_ci_high']:.3f}] "
+                  f"death rate [{row['death_rate_ci_low']:.3f}, {row['death_rate_ci_high']:.3f}]")
     print("================================")
 
 
+def print_differences(evaluation, reason):
+    """
+    Paired score differences of every pair of agents of an evaluation
+    """
+    print(f"Stopped after {evaluation.episodes()} episodes per agent: {reason}")
+    for a, b in itertools.combinations(evaluation.agents, 2):
+        mean, low, high = evaluation.difference(a, b)
+        print(f"  {a} - {b}: {mean:.2f} [{low:.2f}, {high:.2f}]"
+              f"{', separated' if evaluation.separated(a, b) else ''}")
+
+
+def print_profile(agent, summary, counters=None):
+    """
+    Per-call timings of an agent's episodes, longest total first, then the
+    counters. Timings are inclusive, e.g. Episode.step contains the agent's
+    next_step.
+    """
+    print(f"{agent} time breakdown (inclusive):")
+    print(f"  {'call':<36} {'calls':>9} {'total s':>9} {'mean us':>9} "
+          f"{'p50 us':>9} {'p95 us':>9} {'p99 us':>9}")
+    for label, row in sorted(summary.items(), key=lambda item: -item[1]['total_seconds']):
+        print(f"  {label:<36} {row['count']:>9} {row['total_seconds']:>9.3f} "
+              f"{row['mean_seconds'] * 1e6:>9.1f} {row['p50_seconds'] * 1e6:>9.1f} "
+              f"{row['p95_seconds'] * 1e6:>9.1f} {row['p99_seconds'] * 1e6:>9.1f}")
+    for name, n in sorted((counters or {}).items()):
+        print(f"  {name:<36} {n:>9}")
+
+
+def main(agents, count, workers=None, seed=None, chunk_size=100, json_path=None, csv_path=None,
+         world=(4, 4, 0.2), corpus=None, profile=False, profile_path=None,
+         agent_params=None, trace_path=None, ci_width=None, rate_width=None, confidence=0.95,
+         batch_size=200) -> int:
+    """
+    agent_params maps agent types to the parameters of their factory.
+    trace_path is the episode trace file written, see models/trace.py.
+    With ci_width, agents play batches of at least batch_size episodes
+    until the confidence interval of their mean score is narrower than
+    ci_width, and those of their win and death rates than rate_width if
+    set, or until the agents' scores are separated, count episodes at most.
+    """
+    agent_params = agent_params or {}
+    profile = profile or bool(profile_path)
+    height, width = world[1], world[0]
+    if corpus:
+        worlds = WorldCorpus(corpus)
+        count = min(count, len(worlds))
+        height, width = worlds.height, worlds.width
+
+    # spawn rather than fork, torch does not survive forking a parent
+    # process that already initialized it
+    context = multiprocessing.get_context('spawn')
+
+    # Every agent gets the same seeds, so the same worlds, also when seed is
+    # None and the entropy is drawn here
+    entropy = np.random.SeedSequence(seed).entropy
+    report = []
+    profiles = {}
+    trace = TraceWriter(trace_path, height, width) if trace_path else None
+    evaluation = None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        if ci_width:
+            evaluation = SequentialEvaluation(agents, ci_width, rate_width, confidence,
+                                              count, batch_size)
+            profiles = {agent: Instrumentation() if profile else None for agent in agents}
+            report, reason = evaluate(agents, executor, entropy, chunk_size, world, evaluation,
+                                      corpus, profiles, agent_params, trace)
+        else:
+            for agent in agents:
+                profiles[agent] = Instrumentation() if profile else None
+                report.append(benchmark(agent, count, executor, np.random.SeedSequence(entropy),
+                                        chunk_size, world, corpus, profiles[agent],
+                                        agent_params.get(agent), trace))
+    if trace:
+        trace.close()
+
+    print_report(report)
+    if evaluation:
+        print_differences(evaluation, reason)
+    if profile:
+        for agent in agents:
+            print_profile(agent, profiles[agent].summary(), profiles[agent].counters)
+    if profile_path:
+        with open(profile_path, 'w') as f:
+            json.dump({agent: {'timings': p.summary(), 'counters': dict(p.counters),
+                               'episodes': p.episodes}
+                       for agent, p in profiles.items()}, f, indent=2)
+    if json_path:
+        write_json(report, json_path)
+    if csv_path:
+        write_csv(report, csv_path)
+
+    return 0
+
+
 if __name__ == '__main__':
-    main(sys.argv[1], int(sys.argv[2]))
+    parser = argparse.ArgumentParser(description="Benchmark wumpus agents")
+    parser.add_argument('agents', help="comma separated agent types, e.g. naive,move_planning")
+    parser.add_argument('count', type=int, help="episodes per agent")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes, defaults to the number of CPUs")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help="episodes per task sent to a worker")
+    parser.add_argument('--width', type=int, default=4)
+    parser.add_argument('--height', type=int, default=None, help="defaults to the width")
+    parser.add_argument('--pit-proba', type=float, default=0.2)
+    parser.add_argument('--corpus', help="world corpus file to play instead of random worlds, "
+                        "see generate_worlds.py")
+    parser.add_argument('--profile', action='store_true',
+                        help="time agent, inference, planning and environment calls")
+    parser.add_argument('--profile-json', dest='profile_path',
+                        help="write the timings per agent and per episode as JSON, implies --profile")
+    parser.add_argument('--json', dest='json_path')
+    parser.add_argument('--csv', dest='csv_path')
+    parser.add_argument('--agent-params', type=json.loads, default=None,
+                        help="JSON object of factory parameters per agent type, "
+                        "e.g. '{\"proba_agent\": {\"inference\": \"loopy_bp\"}}'")
+    parser.add_argument('--ci-width', type=float, default=None,
+                        help="run episodes in batches until the confidence interval of the "
+                        "mean score is narrower than this, count being the maximum")
+    parser.add_argument('--rate-width', type=float, default=None,
+                        help="with --ci-width, also wait for the win and death rate intervals "
+                        "to be narrower than this")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--batch-size', type=int, default=200,
+                        help="with --ci-width, minimum episodes per agent per batch")
+    parser.add_argument('--trace', dest='trace_path',
+                        help="record every step of every episode to this trace file")
+    args = parser.parse_args()
+
+    if 'human' in args.agents.split(','):
+        parser.error("human agent can't be benchmarked")
+    unknown = set(args.agents.split(',')) - set(agent_types())
+    if unknown:
+        parser.error(f"unknown agent types {', '.join(sorted(unknown))}, "
+                     f"expected some of {', '.join(agent_types())}")
+
+    sys.exit(main(args.agents.split(','), args.count, args.workers, args.seed,
+                  args.chunk_size, args.json_path, args.csv_path,
+                  (args.width, args.height or args.width, args.pit_proba), args.corpus,
+                  args.profile, args.profile_path, args.agent_params,
+                  args.trace_path, args.ci_width, args.rate_width, args.confidence,
+                  args.batch_size))
@@ -0,0 +1,27 @@
+import argparse
+import sys
+import time
+
+from models.world_corpus import generate_corpus
+
+
+def main(path, count, width, height, pit_proba, seed) -> int:
+    start = time.perf_counter()
+    generate_corpus(path, count, width, height, pit_proba, seed)
+    elapsed = time.perf_counter() - start
+    print(f"{count} worlds written to {path} in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write random worlds to a corpus file")
+    parser.add_argument('path')
+    parser.add_argument('count', type=int)
+    parser.add_argument('--width', type=int, default=4)
+    parser.add_argument('--height', type=int, default=None, help="defaults to the width")
+    parser.add_argument('--pit-proba', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sys.exit(main(args.path, args.count, args.width, args.height or args.width,
+                  args.pit_proba, args.seed))
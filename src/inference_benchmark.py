@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+
+import numpy as np
+
+from models.environment import Environment
+from models.agent.inference import BACKENDS, compare_to_exact
+
+
+def explored_observations(environment, steps, rng):
+    """
+    Pit observation vector after a random walk over safe cells, the layout
+    ProbaAgent uses: visited cells are known safe and have their breeze set
+    """
+    height, width = environment.gridHeight, environment.gridWidth
+    size = height * width
+    observations = np.full(2 * size, -1)
+
+    loc = (0, 0)
+    for _ in range(steps):
+        idx = loc[0] * width + loc[1]
+        observations[idx] = 0
+        observations[size + idx] = int(environment._is_breeze(loc))
+
+        moves = [(loc[0] + dr, loc[1] + dc) for dr, dc in ((0, 1), (1, 0), (0, -1), (-1, 0))]
+        moves = [m for m in moves if 0 <= m[0] < height and 0 <= m[1] < width
+                 and not environment._is_pit(m)]
+        if not moves:
+            break
+        loc = moves[rng.integers(len(moves))]
+
+    return observations
+
+
+def main(width, height, pit_proba, cases, steps, seed, options) -> int:
+    world_seed, walk_seed = np.random.SeedSequence(seed).spawn(2)
+    rng = np.random.default_rng(walk_seed)
+
+    observations = [explored_observations(Environment(width, height, pitProb=pit_proba, seed=s), steps, rng)
+                    for s in world_seed.spawn(cases)]
+
+    report = {}
+    for name, backend in BACKENDS.items():
+        if name == 'exact':
+            continue
+        model = backend(height, width, pit_proba, **options.get(name, {}))
+        report[name] = compare_to_exact(model, observations)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Error and speed of approximate inference backends against exact inference")
+    parser.add_argument('--width', type=int, default=4)
+    parser.add_argument('--height', type=int, default=None, help="defaults to the width")
+    parser.add_argument('--pit-proba', type=float, default=0.2)
+    parser.add_argument('--cases', type=int, default=100, help="random evidence sets")
+    parser.add_argument('--steps', type=int, default=10, help="random walk length per case")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--options', type=json.loads, default={},
+                        help='backend options as JSON, e.g. \'{"gibbs": {"n_sweeps": 500}}\'')
+    args = parser.parse_args()
+
+    sys.exit(main(args.width, args.height or args.width, args.pit_proba, args.cases,
+                  args.steps, args.seed, args.options))
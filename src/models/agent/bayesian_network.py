@@ -0,0 +1,131 @@
+import itertools
+import json
+import os
+import numpy as np
+
+from pomegranate.distributions import Categorical
+from pomegranate.distributions import ConditionalCategorical
+from pomegranate.bayesian_network import BayesianNetwork
+import torch
+
+from .inference import surrounding_cells
+
+
+def _transform_distribution(dist):
+    """
+    Transform distribution to pomegranate distribution structure
+    """
+    mid = len(dist)//2
+    dist = [dist[:mid], dist[mid:]]
+
+    if len(dist[0]) > 2:
+        dist[0] = _transform_distribution(dist[0])
+    if len(dist[1]) > 2:
+        dist[1] = _transform_distribution(dist[1])
+    return dist
+
+
+def _build_percept_table(n_parents):
+    # pandas is only needed when a table is not cached yet
+    import pandas as pd
+
+    table = list(itertools.product(
+        [False, True], repeat=n_parents+1))
+    parents = list(range(n_parents))
+    df = pd.DataFrame(table, columns=parents + ['percept'])
+    df['any'] = df.apply(lambda x: any(x[parents]), axis=1)
+    df['prob'] = df.apply(lambda x: 1.0 if x['any'] ==
+                          x['percept'] else 0.0, axis=1)
+    return _transform_distribution(df['prob'].tolist())
+
+
+_percept_tables = {}
+
+
+def percept_table(n_parents, cache_dir=None):
+    """
+    Conditional table of a percept node given its n_parents adjacent hazards,
+    the percept is true iff any of them is. It only depends on n_parents so
+    it is built once per process, and once overall when cache_dir is set.
+    """
+    if n_parents in _percept_tables:
+        return _percept_tables[n_parents]
+
+    path = None
+    if cache_dir:
+        path = os.path.join(cache_dir, f"percept_table_{n_parents}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                _percept_tables[n_parents] = json.load(f)
+            return _percept_tables[n_parents]
+
+    table = _build_percept_table(n_parents)
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(table, f)
+        os.replace(tmp_path, path)
+
+    _percept_tables[n_parents] = table
+    return table
+
+
+def build_model(height, width, proba, cache_dir=None):
+    """
+    Bayesian network of one hazard node per cell with prior proba, and one
+    percept node per cell that is true iff any adjacent cell has the hazard.
+    Nodes are ordered [hazards ..., percepts ...].
+    """
+    model = BayesianNetwork()
+
+    hazard_dists = {}
+    for row in range(height):
+        for col in range(width):
+            hazard_dists[(row, col)] = Categorical([[1-proba, proba]])
+            model.add_distribution(hazard_dists[(row, col)])
+
+    for row in range(height):
+        for col in range(width):
+            adjacent_cells = surrounding_cells(row, col, height, width)
+            percept_dist = ConditionalCategorical(
+                [percept_table(len(adjacent_cells), cache_dir)])
+            model.add_distribution(percept_dist)
+
+            for adj in adjacent_cells:
+                model.add_edge(hazard_dists[adj], percept_dist)
+
+    return model
+
+
+_models = {}
+
+
+def load_model(height, width, proba, cache_dir=None):
+    """
+    Returns the network for the given grid and prior, built once per process
+    """
+    key = (height, width, float(proba))
+    if key not in _models:
+        _models[key] = build_model(height, width, proba, cache_dir)
+    return _models[key]
+
+
+class BayesianNetworkInference:
+    """
+    pomegranate backed inference with the same interface as ExactInference.
+    Much slower, kept as a reference implementation.
+    """
+
+    def __init__(self, height, width, prior, cache_dir=None):
+        self.size = height * width
+        self.model = load_model(height, width, prior, cache_dir)
+
+    def marginals(self, observations, rng=None, info=None):
+        X = torch.tensor(np.array([observations]))
+
+        X_masked = torch.masked.MaskedTensor(X, mask=X >= 0)
+        prediction = self.model.predict_proba(X_masked)
+
+        return np.array([p[0][1].item() for p in prediction[:self.size]])
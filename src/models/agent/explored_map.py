@@ -0,0 +1,104 @@
+import numpy as np
+
+from .inference import surrounding_cells
+from .planner import GridPlanner
+
+
+class ExploredMap:
+    """
+    What an agent knows of the grid, as (height, width) boolean masks:
+    visited cells, cells known to be safe and frontier cells, i.e. unvisited
+    cells next to a visited one.
+
+    Frontier nodes, a frontier cell with the orientation the agent has when
+    stepping into it from a visited neighbour, are kept up to date on every
+    visit so listing them does not scan the grid.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.visited = np.zeros((height, width), dtype=bool)
+        self.safe = np.zeros((height, width), dtype=bool)
+        self.frontier = np.zeros((height, width), dtype=bool)
+        self.planner = GridPlanner(height, width)
+
+        # Ordered set of (cell, orientation) frontier nodes
+        self._frontier_nodes = {}
+
+    def visit(self, loc):
+        if self.visited[loc]:
+            return
+        self.visited[loc] = True
+        self.safe[loc] = True
+        self.frontier[loc] = False
+
+        for orientation in range(4):
+            self._frontier_nodes.pop((loc, orientation), None)
+
+        for cell in surrounding_cells(loc[0], loc[1], self.height, self.width):
+            if not self.visited[cell]:
+                self.frontier[cell] = True
+                self._frontier_nodes[(cell, relative_orientation(cell, loc))] = None
+
+    def mark_safe(self, loc):
+        self.safe[loc] = True
+
+    def is_frontier(self, loc):
+        return bool(self.frontier[loc])
+
+    def frontier_nodes(self):
+        """
+        (cell, orientation) nodes entering the frontier, in discovery order
+        """
+        return list(self._frontier_nodes)
+
+    def plan(self, from_node, nodes):
+        """
+        Shortest actions from from_node to the closest of nodes through
+        visited cells. Returns (actions, node reached) or (None, None).
+        """
+        goals = [self.planner.state(*node) for node in nodes]
+        actions, goal = self.planner.plan(
+            self.planner.state(*from_node), goals, self.visited)
+        if goal is None:
+            return None, None
+        return actions, self.planner.location(goal)
+
+    def plan_home(self, from_node):
+        return self.planner.plan_home(self.planner.state(*from_node), self.visited)
+
+    def reachable(self, from_node):
+        """
+        (height, width, 4) mask of the (cell, orientation) states reachable
+        from from_node through visited cells
+        """
+        states = self.planner.reachable(self.planner.state(*from_node), self.visited)
+        return states.reshape(self.height, self.width, 4)
+
+    def visualize(self, path):
+        # matplotlib is only needed when debugging
+        import matplotlib.pyplot as plt
+
+        image = np.zeros((self.height, self.width))
+        image[self.safe] = 1
+        image[self.visited] = 2
+        image[self.frontier] = 3
+
+        plt.figure().clear()
+        plt.imshow(image, origin='lower')
+        plt.title("visited (2), safe (1), frontier (3)")
+        plt.savefig(path)
+
+
+def relative_orientation(cell, from_cell):
+    """
+    Orientation index of an adjacent cell as seen from from_cell
+    """
+    if cell[0] > from_cell[0]:
+        return 3  # up
+    elif cell[0] < from_cell[0]:
+        return 1  # down
+    elif cell[1] > from_cell[1]:
+        return 0  # right
+    return 2  # left
@@ -1,9 +1,20 @@
 class HumanAgent:
-    choices = []
-
     def __init__(self, choices):
         self.choices = choices
 
+    @classmethod
+    def from_context(cls, context, choices=('f', 'l', 'r', 's', 'g', 'c')):
+        return cls(list(choices))
+
+    def reset(self, agent_state=None):
+        pass
+
+    def observe(self, action, percepts):
+        pass
+
+    def close(self):
+        pass
+
     def next_step(self, percepts=None):
         while True:
             action = input("Enter your action: ")
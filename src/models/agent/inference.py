@@ -0,0 +1,410 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def surrounding_cells(row, col, height, width):
+    """
+    4-adjacent cells of (row, col) in the same order as
+    ProbaAgent._get_surrounding_cell: top, right, bottom, left
+    """
+    cells = []
+    if row + 1 < height:
+        cells.append((row + 1, col))
+    if col + 1 < width:
+        cells.append((row, col + 1))
+    if row - 1 >= 0:
+        cells.append((row - 1, col))
+    if col - 1 >= 0:
+        cells.append((row, col - 1))
+    return cells
+
+
+class HazardInference:
+    """
+    Posterior marginals for a grid of independent hazards (pits or wumpus)
+    with prior probability prior, observed through percepts (breeze or
+    stench) that are true iff any 4-adjacent cell holds a hazard.
+
+    Observations use the layout of the bayesian network models:
+    [hazard_0 ... hazard_n-1, percept_0 ... percept_n-1] with -1 for unknown.
+
+    Subclasses implement _solve, which receives the frontier as clauses
+    "at least one of these unknown cells is a hazard", and may return a dict
+    of diagnostics of the call.
+    """
+
+    def __init__(self, height, width, prior):
+        self.height = height
+        self.width = width
+        self.prior = prior
+        self.size = height * width
+
+        self._neighbours = [
+            np.array([r * width + c for r, c in surrounding_cells(i // width, i % width, height, width)])
+            for i in range(self.size)]
+
+    def marginals(self, observations, rng=None, info=None):
+        """
+        Probability of a hazard for every cell, as a flat array of size n.
+        rng is the generator of sampling backends, models being shared by
+        agents the randomness belongs to the caller. info, if given, is a
+        dict updated with the diagnostics of this call, e.g. the iterations
+        of loopy_bp or the sweeps of gibbs.
+        """
+        observations = np.asarray(observations)
+        hazard = observations[:self.size]
+        percept = observations[self.size:2 * self.size]
+
+        result = np.where(hazard >= 0, hazard, self.prior).astype(float)
+        unknown = hazard < 0
+
+        # A percept of 0 rules out every neighbour, a percept of 1 is a clause
+        # "at least one unknown neighbour is a hazard". Percepts already
+        # explained by a known hazard add no information.
+        clauses = []
+        for cell in np.flatnonzero(percept >= 0):
+            adjacent = self._neighbours[cell]
+            if (hazard[adjacent] == 1).any():
+                continue
+            if percept[cell] == 0:
+                unknown[adjacent] = False
+                result[adjacent] = 0.0
+            else:
+                clauses.append(adjacent)
+
+        clauses = [c[unknown[c]] for c in clauses]
+        # Empty clauses contradict the known cells and are ignored
+        clauses = [c for c in clauses if len(c)]
+
+        if clauses:
+            diagnostics = self._solve(result, clauses, rng)
+            if info is not None and diagnostics:
+                info.update(diagnostics)
+        return result
+
+    def _solve(self, result, clauses, rng):
+        raise NotImplementedError
+
+
+class ExactInference(HazardInference):
+    """
+    Exact marginals. Only frontier cells, i.e. unknown cells next to an
+    observed percept, are enumerated. They are split into independent
+    components and each one is enumerated as a whole with NumPy, all cells
+    being covered in one pass. Component results are cached by their
+    constraints, so a new observation only recomputes the components it
+    changed.
+
+    Components of more than max_frontier cells are approximated to keep
+    large worlds tractable: their clauses are split into chunks of at most
+    max_frontier cells that are enumerated separately, ignoring constraints
+    between chunks, and the marginals of cells in several chunks averaged.
+
+    Models are shared by agents in several threads, the component cache is
+    only read and written under _cache_lock.
+    """
+    # A class attribute so models stay copyable
+    _cache_lock = threading.Lock()
+
+    def __init__(self, height, width, prior, max_frontier=16, max_cached_components=4096):
+        super().__init__(height, width, prior)
+        self.max_frontier = max_frontier
+
+        self.max_cached_components = max_cached_components
+        self._component_cache = {}
+
+    def _solve(self, result, clauses, rng):
+        for cells, component in self._components(clauses):
+            result[cells] = self._component_marginals(cells, component)
+
+    def _components(self, clauses):
+        """
+        Group clauses that share cells. Yields (cells, clauses) per group.
+        """
+        parent = {}
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for clause in clauses:
+            for cell in clause:
+                parent.setdefault(cell, cell)
+            root = find(clause[0])
+            for cell in clause[1:]:
+                parent[find(cell)] = root
+
+        groups = {}
+        for clause in clauses:
+            groups.setdefault(find(clause[0]), []).append(clause)
+
+        for group in groups.values():
+            cells = np.unique(np.concatenate(group))
+            yield cells, group
+
+    def _component_marginals(self, cells, clauses):
+        key = frozenset(tuple(c) for c in clauses)
+        with self._cache_lock:
+            marginals = self._component_cache.get(key)
+        if marginals is None:
+            # Computed outside the lock, threads computing the same
+            # component store equal results
+            marginals = self._compute_component(cells, clauses)
+            with self._cache_lock:
+                if len(self._component_cache) >= self.max_cached_components:
+                    self._component_cache.clear()
+                self._component_cache[key] = marginals
+        return marginals
+
+    def _compute_component(self, cells, clauses):
+        """
+        Marginals of a component missing from the cache
+        """
+        if len(cells) <= self.max_frontier:
+            return self._enumerate(cells, clauses)
+        return self._approximate(cells, clauses)
+
+    def _chunks(self, clauses):
+        """
+        Split clauses into groups covering at most max_frontier cells,
+        growing each group from neighbouring clauses to keep it local
+        """
+        remaining = list(clauses)
+        while remaining:
+            chunk = [remaining.pop(0)]
+            cells = set(chunk[0])
+            grown = True
+            while grown:
+                grown = False
+                for i, clause in enumerate(remaining):
+                    if cells.intersection(clause) and \
+                            len(cells.union(clause)) <= self.max_frontier:
+                        chunk.append(remaining.pop(i))
+                        cells.update(clause)
+                        grown = True
+                        break
+            yield np.array(sorted(cells)), chunk
+
+    def _approximate(self, cells, clauses):
+        column = {cell: i for i, cell in enumerate(cells)}
+        total = np.zeros(len(cells))
+        count = np.zeros(len(cells))
+        for chunk_cells, chunk in self._chunks(clauses):
+            idx = [column[c] for c in chunk_cells]
+            total[idx] += self._enumerate(chunk_cells, chunk)
+            count[idx] += 1
+        return total / count
+
+    def _enumerate(self, cells, clauses):
+        k = len(cells)
+        column = {cell: i for i, cell in enumerate(cells)}
+
+        assignments = ((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1).astype(bool)
+
+        consistent = np.ones(len(assignments), dtype=bool)
+        for clause in clauses:
+            consistent &= assignments[:, [column[c] for c in clause]].any(axis=1)
+        assignments = assignments[consistent]
+
+        count = assignments.sum(axis=1)
+        weights = self.prior ** count * (1 - self.prior) ** (k - count)
+
+        return weights @ assignments / weights.sum()
+
+
+def _clause_matrix(clauses):
+    """
+    Frontier cells and clauses as a (clauses, 4) array of column indexes
+    into cells, padded with -1
+    """
+    cells = np.unique(np.concatenate(clauses))
+    column = {cell: i for i, cell in enumerate(cells)}
+    matrix = np.full((len(clauses), 4), -1)
+    for i, clause in enumerate(clauses):
+        matrix[i, :len(clause)] = [column[c] for c in clause]
+    return cells, matrix
+
+
+class LoopyBeliefPropagation(HazardInference):
+    """
+    Sum-product belief propagation on the factor graph of the frontier,
+    one factor per clause. Messages are kept as log-odds and updated for all
+    edges at once. Exact on trees, an approximation when the frontier has
+    loops.
+
+    Stops after max_iter iterations, when no message changes by more than
+    tol, or when time_budget seconds are spent. damping in [0, 1) mixes the
+    previous messages in for stability.
+    """
+
+    def __init__(self, height, width, prior, max_iter=50, tol=1e-6, time_budget=None, damping=0.0):
+        super().__init__(height, width, prior)
+        self.max_iter = max_iter
+        self.tol = tol
+        self.time_budget = time_budget
+        self.damping = damping
+
+    def _solve(self, result, clauses, rng):
+        start = time.perf_counter()
+        eps = 1e-12
+
+        cells, matrix = _clause_matrix(clauses)
+        mask = matrix >= 0
+        var = np.where(mask, matrix, 0)
+        prior_logit = np.log(self.prior / (1 - self.prior))
+
+        # Factor to variable messages, log(F(x=1) / F(x=0)) per edge
+        factor_msg = np.zeros(matrix.shape)
+        for iteration in range(1, self.max_iter + 1):
+            logit = np.full(len(cells), prior_logit)
+            np.add.at(logit, var[mask], factor_msg[mask])
+
+            # Variable to factor: belief without the factor's own message
+            var_msg = 1 / (1 + np.exp(-(logit[var] - factor_msg)))
+            off = np.where(mask, 1 - var_msg, 1.0)
+
+            # A clause only constrains x=0, and only if every other cell is 0:
+            # F(1) = 1, F(0) = 1 - prod(P(other = 0))
+            others_off = np.ones(matrix.shape)
+            for j in range(matrix.shape[1]):
+                others_off[:, j] = np.prod(np.delete(off, j, axis=1), axis=1)
+            new_msg = -np.log(np.clip(1 - others_off, eps, 1.0))
+            new_msg = np.where(mask, new_msg, 0.0)
+
+            delta = np.abs(new_msg - factor_msg).max()
+            factor_msg = self.damping * factor_msg + (1 - self.damping) * new_msg
+            if delta < self.tol:
+                break
+            if self.time_budget is not None and time.perf_counter() - start > self.time_budget:
+                break
+
+        logit = np.full(len(cells), prior_logit)
+        np.add.at(logit, var[mask], factor_msg[mask])
+        result[cells] = 1 / (1 + np.exp(-logit))
+        return {'iterations': iteration}
+
+
+class GibbsSampler(HazardInference):
+    """
+    Gibbs sampling over the frontier with n_chains chains run side by side as
+    NumPy arrays. Chains start from the all-hazard assignment, which satisfies
+    every clause, and each sweep resamples the cells one after the other.
+
+    Runs n_sweeps sweeps, the first burn_in being discarded, or stops earlier
+    once time_budget seconds are spent. Samples are drawn from the rng given
+    to marginals, or from a new generator seeded with seed on every call.
+    """
+
+    def __init__(self, height, width, prior, n_chains=256, n_sweeps=200, burn_in=20,
+                 time_budget=None, seed=None):
+        super().__init__(height, width, prior)
+        self.n_chains = n_chains
+        self.n_sweeps = n_sweeps
+        self.burn_in = burn_in
+        self.time_budget = time_budget
+        self.seed = seed
+
+    def _solve(self, result, clauses, rng):
+        start = time.perf_counter()
+        if rng is None:
+            rng = np.random.default_rng(self.seed)
+
+        cells, matrix = _clause_matrix(clauses)
+        cell_clauses = [np.flatnonzero((matrix == i).any(axis=1)) for i in range(len(cells))]
+
+        state = np.ones((self.n_chains, len(cells)), dtype=bool)
+        # Number of hazards in each clause, per chain
+        count = np.tile((matrix >= 0).sum(axis=1), (self.n_chains, 1))
+
+        total = np.zeros(len(cells))
+        samples = 0
+        for sweep in range(1, self.n_sweeps + 1):
+            for i, owned in enumerate(cell_clauses):
+                # The cell may be empty only if every clause it is in keeps
+                # another hazard
+                old = state[:, i]
+                free = ((count[:, owned] - old[:, None]) > 0).all(axis=1)
+                new = ~free | (rng.random(self.n_chains) < self.prior)
+                count[:, owned] += (new.astype(int) - old)[:, None]
+                state[:, i] = new
+
+            if sweep > self.burn_in:
+                total += state.sum(axis=0)
+                samples += self.n_chains
+            if self.time_budget is not None and time.perf_counter() - start > self.time_budget:
+                break
+
+        if samples == 0:
+            total, samples = state.sum(axis=0), self.n_chains
+        result[cells] = total / samples
+        return {'sweeps': sweep}
+
+
+BACKENDS = {
+    'exact': ExactInference,
+    'loopy_bp': LoopyBeliefPropagation,
+    'gibbs': GibbsSampler,
+}
+
+
+def compare_to_exact(model, observations_list):
+    """
+    Error of model against ExactInference over a list of observation
+    vectors. Returns a dict with the max and mean absolute error of the
+    marginals and the mean seconds per call of both.
+    """
+    exact = ExactInference(model.height, model.width, model.prior, max_frontier=model.size)
+    errors = []
+    model_time = exact_time = 0.0
+    for observations in observations_list:
+        start = time.perf_counter()
+        expected = exact.marginals(observations)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = model.marginals(observations)
+        model_time += time.perf_counter() - start
+
+        errors.append(np.abs(actual - expected))
+
+    errors = np.concatenate(errors)
+    return {
+        'max_error': float(errors.max()),
+        'mean_error': float(errors.mean()),
+        'seconds_per_call': model_time / len(observations_list),
+        'exact_seconds_per_call': exact_time / len(observations_list),
+    }
+
+
+class BeliefState:
+    """
+    Posterior of a model for an agent's changing observation vector.
+    Results are memoized by observation vector, so steps that add no new
+    evidence (turning, bumping) or return to a known evidence state cost a
+    lookup. Returned arrays are read-only. rng is passed to the model.
+    """
+
+    def __init__(self, model, cache_size=256, rng=None):
+        self.model = model
+        self.rng = rng
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def marginals(self, observations):
+        key = np.asarray(observations).tobytes()
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            return result
+
+        result = self.model.marginals(observations, self.rng)
+        result.setflags(write=False)
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
@@ -2,10 +2,25 @@ import numpy as np
 
 
 class NaiveAgent:
-    choices = []
-
-    def __init__(self, choices):
+    def __init__(self, choices, rng=None):
+        """
+        rng is the np.random.Generator picking the actions
+        """
         self.choices = choices
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    @classmethod
+    def from_context(cls, context, choices=('f', 'l', 'r', 's', 'g', 'c')):
+        return cls(list(choices), context.rng)
+
+    def reset(self, agent_state=None):
+        pass
+
+    def observe(self, action, percepts):
+        pass
+
+    def close(self):
+        pass
 
     def next_step(self, percepts=None):
-        return np.random.choice(self.choices, 1)
+        return self.rng.choice(self.choices, 1)
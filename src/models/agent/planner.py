@@ -0,0 +1,116 @@
+from collections import deque
+
+import numpy as np
+
+from ..environment import FORWARD_DELTA
+
+# Planner actions in the order of GridPlanner.transitions columns
+ACTIONS = ['f', 'l', 'r']
+
+
+class GridPlanner:
+    """
+    Shortest action sequences over the (row, col, orientation) states of a
+    grid, every action costing one step.
+
+    States are flat ints (row * width + col) * 4 + orientation. The state
+    reached by each of 'f', 'l' and 'r' is precomputed in transitions, -1
+    when moving forward would hit a wall.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+
+        states = np.arange(height * width * 4)
+        cell, orientation = states // 4, states % 4
+        row, col = cell // width, cell % width
+
+        delta = np.array(FORWARD_DELTA)
+        next_row = row + delta[orientation, 0]
+        next_col = col + delta[orientation, 1]
+        inside = (next_row >= 0) & (next_row < height) & (next_col >= 0) & (next_col < width)
+
+        self.transitions = np.stack([
+            np.where(inside, (next_row * width + next_col) * 4 + orientation, -1),
+            cell * 4 + (orientation - 1) % 4,
+            cell * 4 + (orientation + 1) % 4,
+        ], axis=1)
+        # Python lists are faster than array indexing in the search loop
+        self._transitions = self.transitions.tolist()
+
+    def state(self, loc, orientation):
+        return (loc[0] * self.width + loc[1]) * 4 + orientation
+
+    def location(self, state):
+        """
+        (loc, orientation) of a state
+        """
+        cell, orientation = divmod(state, 4)
+        return divmod(cell, self.width), orientation
+
+    def plan(self, start, goals, passable):
+        """
+        Breadth first search from the start state to the closest of the goal
+        states. Moving forward is only allowed into passable cells (flat
+        boolean array) or into a goal state.
+
+        Returns (actions, goal) or (None, None) if no goal can be reached
+        """
+        goals = set(goals)
+        if start in goals:
+            return [], start
+
+        passable = np.asarray(passable).ravel().tolist()
+        parent = {start: None}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            for action, next_state in enumerate(self._transitions[state]):
+                if next_state < 0 or next_state in parent:
+                    continue
+                is_goal = next_state in goals
+                if action == 0 and not (is_goal or passable[next_state // 4]):
+                    continue
+
+                parent[next_state] = (state, action)
+                if is_goal:
+                    return self._actions(parent, next_state), next_state
+                queue.append(next_state)
+
+        return None, None
+
+    def _actions(self, parent, state):
+        actions = []
+        while parent[state] is not None:
+            state, action = parent[state]
+            actions.append(ACTIONS[action])
+        actions.reverse()
+        return actions
+
+    def reachable(self, start, passable):
+        """
+        Boolean array of the states reachable from start when moving forward
+        only into passable cells
+        """
+        passable = np.asarray(passable).ravel()
+        # Forward moves into impassable cells are dropped
+        transitions = self.transitions.copy()
+        forward = transitions[:, 0]
+        forward[(forward >= 0) & ~passable[np.maximum(forward, 0) // 4]] = -1
+
+        seen = np.zeros(len(transitions), dtype=bool)
+        seen[start] = True
+        frontier = np.array([start])
+        while len(frontier):
+            following = transitions[frontier].ravel()
+            following = np.unique(following[following >= 0])
+            frontier = following[~seen[following]]
+            seen[frontier] = True
+        return seen
+
+    def plan_home(self, start, passable):
+        """
+        Shortest actions from start back to (0, 0) in any orientation
+        """
+        return self.plan(start, [0, 1, 2, 3], passable)[0]
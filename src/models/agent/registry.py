@@ -0,0 +1,118 @@
+import importlib
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+
+# Installed packages can add agent types with an entry point in this group
+# naming a factory, e.g. in pyproject.toml:
+#   [project.entry-points."wumpus.agents"]
+#   my_agent = "my_package.agents:MyAgent.from_context"
+ENTRY_POINT_GROUP = 'wumpus.agents'
+
+
+class Agent(Protocol):
+    """
+    What an episode expects from an agent
+    """
+
+    def reset(self, agent_state=None):
+        """
+        Forget the previous episode, agent_state is the state of the new one
+        """
+
+    def next_step(self, percepts):
+        """
+        Action to play after perceiving percepts
+        """
+
+    def observe(self, action, percepts):
+        """
+        Called after every step with the action played and the percepts
+        that followed it
+        """
+
+    def close(self):
+        """
+        Release what the agent holds between episodes
+        """
+
+
+@dataclass
+class AgentContext:
+    """
+    What a factory knows of the episode the agent plays
+    """
+    agent_state: Any
+    width: int
+    height: int
+    pit_proba: float
+    rng: Any  # np.random.Generator of the episode
+    verbose: bool = False
+
+
+# Agent type -> (factory, default parameters). A factory is called with an
+# AgentContext and the parameters, and is either a callable or a
+# "module:attribute" string, modules relative to this package, imported
+# when an agent of that type is first created.
+_agents = {
+    'naive': ('.naive_agent:NaiveAgent.from_context', {}),
+    'move_planning': ('.move_planning_agent:MovePlanningAgent.from_context', {}),
+    'proba_agent': ('.proba_agent:ProbaAgent.from_context', {}),
+    'human': ('.human_agent:HumanAgent.from_context', {}),
+}
+_entry_points_loaded = False
+
+
+def register_agent(agent_type, factory, **params):
+    """
+    Register or replace an agent type. params are default parameters of the
+    factory, overridden by those given to create_agent.
+    """
+    _agents[agent_type] = (factory, params)
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib import metadata  # slow to import, only needed for unknown types
+    for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP):
+        # Explicit registrations win over installed packages
+        _agents.setdefault(entry_point.name, (entry_point.value, {}))
+
+
+def _resolve(factory):
+    if callable(factory):
+        return factory
+    module_name, _, attribute = factory.partition(':')
+    target = importlib.import_module(module_name, __package__)
+    for name in attribute.split('.'):
+        target = getattr(target, name)
+    return target
+
+
+def agent_types():
+    _load_entry_points()
+    return sorted(_agents)
+
+
+def agent_factory(agent_type):
+    """
+    Factory of an agent type and its default parameters
+    """
+    if agent_type not in _agents:
+        _load_entry_points()
+    if agent_type not in _agents:
+        raise ValueError(
+            f"Unknown agent type {agent_type!r}, expected one of {', '.join(agent_types())}")
+    factory, params = _agents[agent_type]
+    return _resolve(factory), params
+
+
+def create_agent(agent_type, context, **params):
+    """
+    New agent of a registered type for the episode of context
+    """
+    factory, defaults = agent_factory(agent_type)
+    return factory(context, **{**defaults, **params})
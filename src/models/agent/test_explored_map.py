@@ -0,0 +1,55 @@
+import unittest
+
+from .explored_map import ExploredMap, relative_orientation
+
+
+class TestExploredMap(unittest.TestCase):
+    def setUp(self):
+        self.map = ExploredMap(3, 4)
+
+    def test_visit(self):
+        self.map.visit((0, 0))
+        self.assertTrue(self.map.visited[0, 0])
+        self.assertTrue(self.map.safe[0, 0])
+        self.assertTrue(self.map.is_frontier((1, 0)))
+        self.assertTrue(self.map.is_frontier((0, 1)))
+        self.assertEqual(self.map.frontier_nodes(), [((1, 0), 3), ((0, 1), 0)])
+
+        self.map.visit((0, 1))
+        self.assertFalse(self.map.is_frontier((0, 1)))
+        self.assertNotIn(((0, 1), 0), self.map.frontier_nodes())
+        self.assertIn(((1, 1), 3), self.map.frontier_nodes())
+        self.assertIn(((0, 2), 0), self.map.frontier_nodes())
+
+    def test_plan(self):
+        for loc in [(0, 0), (0, 1), (1, 1)]:
+            self.map.visit(loc)
+
+        actions, node = self.map.plan(((0, 0), 0), [((1, 2), 0), ((2, 1), 3)])
+        self.assertEqual(actions, ['f', 'l', 'f', 'f'])
+        self.assertEqual(node, ((2, 1), 3))
+
+        # Frontier cells can only be entered, not crossed
+        self.assertEqual(self.map.plan(((0, 0), 0), [((2, 2), 0)]), (None, None))
+
+    def test_plan_home(self):
+        for loc in [(0, 0), (0, 1), (1, 1)]:
+            self.map.visit(loc)
+        self.assertEqual(self.map.plan_home(((1, 1), 3)), ['l', 'l', 'f', 'r', 'f'])
+
+    def test_reachable(self):
+        self.map.visit((0, 0))
+        self.map.visit((0, 1))
+        reachable = self.map.reachable(((0, 0), 0))
+        self.assertTrue(reachable[0, 1].all())
+        self.assertFalse(reachable[1].any())
+
+    def test_relative_orientation(self):
+        self.assertEqual(relative_orientation((1, 1), (1, 0)), 0)
+        self.assertEqual(relative_orientation((0, 1), (1, 1)), 1)
+        self.assertEqual(relative_orientation((1, 0), (1, 1)), 2)
+        self.assertEqual(relative_orientation((2, 1), (1, 1)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import importlib.util
+import unittest
+
+import numpy as np
+
+from .inference import BeliefState, ExactInference, GibbsSampler, LoopyBeliefPropagation, \
+    compare_to_exact
+
+
+def observations(size, visited, percepts):
+    """
+    Observation vector with visited cells safe and their percepts set
+    """
+    obs = np.full(2 * size, -1)
+    for idx, percept in zip(visited, percepts):
+        obs[idx] = 0
+        obs[size + idx] = percept
+    return obs
+
+
+class TestExactInference(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExactInference(4, 4, .2)
+
+    def test_prior(self):
+        res = self.engine.marginals(observations(16, [0], [0]))
+        self.assertEqual(res[0], 0)
+        # No breeze at start, both neighbours are safe
+        self.assertEqual(res[1], 0)
+        self.assertEqual(res[4], 0)
+        self.assertAlmostEqual(res[15], .2)
+
+    def test_single_breeze(self):
+        res = self.engine.marginals(observations(16, [0], [1]))
+        # P(pit | at least one of two cells has a pit)
+        expected = .2 / (1 - .8 ** 2)
+        self.assertAlmostEqual(res[1], expected)
+        self.assertAlmostEqual(res[4], expected)
+        self.assertAlmostEqual(res[5], .2)
+
+    def test_ruled_out_neighbour(self):
+        # Breeze at (0, 1), none at (0, 0) and (1, 0): pit is at (0, 2) or (1, 1)
+        res = self.engine.marginals(observations(16, [0, 1, 4], [0, 1, 0]))
+        self.assertEqual(res[5], 0)
+        self.assertAlmostEqual(res[2], 1)
+
+    def test_component_cache(self):
+        self.engine.marginals(observations(16, [0], [1]))
+        self.assertEqual(len(self.engine._component_cache), 1)
+
+        # New evidence far from the first component adds a component and
+        # reuses the cached one
+        res = self.engine.marginals(observations(16, [0, 10], [1, 1]))
+        self.assertEqual(len(self.engine._component_cache), 2)
+        self.assertAlmostEqual(res[1], .2 / (1 - .8 ** 2))
+
+    def test_approximation_above_max_frontier(self):
+        exact = ExactInference(6, 6, .2)
+        approx = ExactInference(6, 6, .2, max_frontier=4)
+        # Breezes in 0, 2 and 4 make one component of 6 cells, split in
+        # chunks, the breeze in 30 another one of 2 cells
+        obs = observations(36, [0, 2, 4, 30], [1, 1, 1, 1])
+        component = [1, 3, 5, 6, 8, 10]
+        res = approx.marginals(obs)
+        expected = exact.marginals(obs)
+
+        outside = np.ones(36, dtype=bool)
+        outside[component] = False
+        np.testing.assert_array_equal(res[outside], expected[outside])
+        # Every chunk only adds constraints to the prior
+        self.assertTrue(((res[component] >= .2) & (res[component] <= 1)).all())
+        self.assertFalse(np.allclose(res[component], expected[component]))
+
+        np.testing.assert_array_equal(
+            ExactInference(6, 6, .2, max_frontier=6).marginals(obs), expected)
+
+
+class TestApproximateInference(unittest.TestCase):
+    def setUp(self):
+        self.cases = [
+            observations(16, [0], [1]),
+            observations(16, [0, 1, 4], [0, 1, 1]),
+            observations(16, [0, 1, 2, 6], [1, 1, 0, 1]),
+            observations(16, [0, 1, 5, 4], [0, 1, 0, 1]),
+        ]
+
+    def test_loopy_bp(self):
+        report = compare_to_exact(LoopyBeliefPropagation(4, 4, .2), self.cases)
+        self.assertLess(report['max_error'], 1e-6)
+
+        info = {}
+        LoopyBeliefPropagation(4, 4, .2, max_iter=3).marginals(self.cases[2], info=info)
+        self.assertLessEqual(info['iterations'], 3)
+
+    def test_gibbs(self):
+        report = compare_to_exact(GibbsSampler(4, 4, .2, seed=0), self.cases)
+        self.assertLess(report['max_error'], .05)
+
+    def test_gibbs_rng(self):
+        sampler = GibbsSampler(4, 4, .2, n_sweeps=20)
+        expected = sampler.marginals(self.cases[1], np.random.default_rng(1))
+        # Earlier calls on the shared model do not change the samples
+        sampler.marginals(self.cases[2], np.random.default_rng(2))
+        np.testing.assert_array_equal(
+            sampler.marginals(self.cases[1], np.random.default_rng(1)), expected)
+
+    def test_time_budget(self):
+        sampler = GibbsSampler(4, 4, .2, n_sweeps=10 ** 6, time_budget=0.01, seed=0)
+        info = {}
+        sampler.marginals(self.cases[0], info=info)
+        self.assertLess(info['sweeps'], 10 ** 6)
+
+
+class TestBeliefState(unittest.TestCase):
+    def test_memoized(self):
+        belief = BeliefState(ExactInference(4, 4, .2))
+        obs = observations(16, [0], [1])
+        res = belief.marginals(obs)
+        self.assertIs(belief.marginals(obs.copy()), res)
+        self.assertFalse(res.flags.writeable)
+
+        obs[16 + 1] = 0
+        self.assertIsNot(belief.marginals(obs), res)
+
+
+@unittest.skipUnless(importlib.util.find_spec('pomegranate'), "pomegranate not installed")
+class TestExactMatchesBayesianNetwork(unittest.TestCase):
+    def test_marginals(self):
+        from .bayesian_network import BayesianNetworkInference
+
+        cases = [
+            ([0], [1]),
+            ([0, 1], [1, 1]),
+            ([0, 1, 4], [0, 1, 1]),
+            ([0, 1, 5, 4], [0, 1, 0, 1]),
+            ([0, 1, 2, 6], [1, 1, 0, 1]),
+        ]
+        for prior in (.2, .25):
+            exact = ExactInference(4, 4, prior)
+            network = BayesianNetworkInference(4, 4, prior)
+            for visited, percepts in cases:
+                obs = observations(16, visited, percepts)
+                np.testing.assert_allclose(
+                    exact.marginals(obs), network.marginals(obs), atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from .planner import GridPlanner
+
+
+class TestGridPlanner(unittest.TestCase):
+    def setUp(self):
+        self.planner = GridPlanner(4, 4)
+
+    def test_transitions(self):
+        state = self.planner.state((0, 0), 0)
+        forward, left, right = self.planner.transitions[state]
+        self.assertEqual(self.planner.location(forward), ((0, 1), 0))
+        self.assertEqual(self.planner.location(left), ((0, 0), 3))
+        self.assertEqual(self.planner.location(right), ((0, 0), 1))
+
+        # Facing down from the bottom row hits the wall
+        self.assertEqual(self.planner.transitions[self.planner.state((0, 0), 1), 0], -1)
+
+    def test_plan_home(self):
+        passable = np.zeros((4, 4), dtype=bool)
+        passable[0, :3] = True
+        passable[1, 2] = True
+
+        # At (1, 2) facing up: turn around, go down, turn right, go left twice
+        actions = self.planner.plan_home(self.planner.state((1, 2), 3), passable)
+        self.assertEqual(len(actions), 6)
+        self.assertEqual(actions.count('f'), 3)
+
+    def test_plan_to_closest_goal(self):
+        passable = np.zeros((4, 4), dtype=bool)
+        passable[0, 0] = True
+
+        goals = [self.planner.state((1, 0), 3), self.planner.state((0, 1), 0)]
+        actions, goal = self.planner.plan(self.planner.state((0, 0), 0), goals, passable)
+        self.assertEqual(actions, ['f'])
+        self.assertEqual(self.planner.location(goal), ((0, 1), 0))
+
+    def test_unreachable(self):
+        passable = np.zeros((4, 4), dtype=bool)
+        goals = [self.planner.state((3, 3), 0)]
+        self.assertEqual(self.planner.plan(self.planner.state((0, 0), 0), goals, passable),
+                         (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,25 +14,20 @@ class TestAiAssistedAgent(unittest.TestCase):
         self.agent = ProbaAgent(
             list(actions.keys()), agent_state, 4, .2)
 
-    def test__path_to_actions(self):
-        """
-        without after action
-        """
-        path = [((2, 0), 3), ((2, 0), 0), ((2, 0), 1),
-                ((1, 0), 1), ((1, 0), 0), ((1, 1), 0)]
-        expected = ['r', 'r', 'f', 'l', 'f']
-        result = self.agent._path_to_actions(path)
-        self.assertEqual(expected, result)
-
-    def test__path_to_actions_with_after(self):
-        """
-        with after action
-        """
-        path = [((2, 0), 3), ((2, 0), 0), ((2, 0), 1),
-                ((1, 0), 1), ((1, 0), 0), ((1, 1), 0)]
-        expected = ['r', 'r', 'f', 'l', 'f', 'c']
-        result = self.agent._path_to_actions(path, ['c'])
-        self.assertEqual(expected, result)
+    def test_plan_without_decision(self):
+        self.agent._planned_action = ['l']
+        self.assertEqual(self.agent.next_step(), 'l')
+        self.assertEqual(self.agent.decision, ('planned', None, None))
+
+    def test__set_no_wumpus_from(self):
+        # Shooting down from (2, 1) clears (2, 1), (1, 1) and (0, 1)
+        self.agent._set_no_wumpus_from((2, 1), 1)
+        cleared = [i for i in range(16) if self.agent._wumpus_observations[i] == 0]
+        self.assertEqual(cleared, [0, 1, 5, 9])
+
+        self.agent._set_no_wumpus_from((3, 1), 2)
+        self.assertEqual(self.agent._wumpus_observations[12], 0)
+        self.assertEqual(self.agent._wumpus_observations[13], -1)
 
     def test__cell_to_index(self):
         res = self.agent._cell_to_index((3, 3))
@@ -71,3 +66,26 @@ class TestAiAssistedAgent(unittest.TestCase):
         res = self.agent._get_relative_orientation_of(of_cell, from_cell)
 
         self.assertEqual(res, expected)
+
+    def test__get_dying_probas(self):
+        self.agent._set_breeze((0, 0), True)
+        self.agent._set_stench((0, 0), False)
+        pit, wumpus, dying = self.agent._get_dying_probas()
+        self.assertEqual(dying.shape, (4, 4))
+        self.assertEqual(dying[0, 0], 0)
+        self.assertEqual(wumpus[0, 1], 0)
+        self.assertAlmostEqual(pit[0, 1], .2 / (1 - .8 ** 2))
+        self.assertAlmostEqual(dying[2, 2], .2 + .25 - .2 * .25)
+        self.assertEqual(self.agent._get_dying_proba((0, 1)), dying[0, 1])
+
+    def test_rectangular_grid(self):
+        agent = ProbaAgent(['f', 'l', 'r', 's', 'g', 'c'], AgentState(), 6, .2,
+                           verbose=False, grid_height=3)
+        self.assertEqual(agent._cell_to_index((2, 5)), 17)
+        self.assertEqual(agent._index_to_cell(17), (2, 5))
+
+        agent._set_breeze((2, 5), True)
+        self.assertEqual(agent._pit_observations[18 + 17], 1)
+        pit, _, _ = agent._get_dying_probas()
+        self.assertEqual(pit.shape, (3, 6))
+        self.assertAlmostEqual(pit[1, 5], .2 / (1 - .8 ** 2))
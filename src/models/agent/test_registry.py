@@ -0,0 +1,67 @@
+import unittest
+
+from . import registry
+from .naive_agent import NaiveAgent
+from ..episode import Episode
+
+
+class ForwardAgent(NaiveAgent):
+    """
+    Always moves forward, and counts the steps it observed
+    """
+
+    def __init__(self, choices, rng=None):
+        super().__init__(choices, rng)
+        self.observed = []
+
+    def next_step(self, percepts=None):
+        return ['f']
+
+    def observe(self, action, percepts):
+        self.observed.append(action)
+
+
+class TestRegistry(unittest.TestCase):
+    def tearDown(self):
+        for agent_type in ('forward', 'forward_lazy'):
+            registry._agents.pop(agent_type, None)
+
+    def test_unknown_agent_type(self):
+        with self.assertRaises(ValueError):
+            Episode(False, seed=0).play('unknown')
+
+    def test_builtin_agents(self):
+        for agent_type in ('naive', 'move_planning', 'proba_agent'):
+            result = Episode(False, seed=3).play(agent_type, max_steps=50)
+            self.assertLessEqual(result.steps, 50)
+
+    def test_register_agent(self):
+        registry.register_agent(
+            'forward', lambda context, choices: ForwardAgent(choices, context.rng), choices=['f'])
+        self.assertIn('forward', registry.agent_types())
+
+        episode = Episode(False, seed=5)
+        episode.reset('forward')
+        self.assertEqual(episode.agent.choices, ['f'])
+        episode.reset('forward', agent_params={'choices': ['f', 'l']})
+        self.assertEqual(episode.agent.choices, ['f', 'l'])
+
+    def test_register_agent_by_name(self):
+        registry.register_agent('forward_lazy', f'{__name__}:ForwardAgent.from_context')
+        episode = Episode(False, seed=5)
+        episode.reset('forward_lazy', max_steps=4)
+        agent = episode.agent
+        while episode.step() is None:
+            pass
+        self.assertIsInstance(agent, ForwardAgent)
+        self.assertEqual(agent.observed, ['f'] * episode.steps)
+
+    def test_agent_params(self):
+        episode = Episode(False, seed=2)
+        episode.reset('proba_agent', agent_params={'inference': 'loopy_bp'})
+        self.assertEqual(episode.agent.inference, 'loopy_bp')
+        self.assertFalse(episode.agent.verbose)
+
+
+if __name__ == '__main__':
+    unittest.main()
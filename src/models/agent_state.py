@@ -1,14 +1,19 @@
 class AgentState:
-    location = (0, 0)
-    points = 0
-    orientations = ['right', 'down', 'left', 'up']
-    orientation = 0
-    _points = 0
-
-    _is_dead = False
-    _exited = False
-
-    arrows = 1
+    orientations = ('right', 'down', 'left', 'up')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Back at (0, 0) facing right with one arrow and no points
+        """
+        self.location = (0, 0)
+        self.orientation = 0
+        self.arrows = 1
+        self._points = 0
+        self._is_dead = False
+        self._exited = False
 
     def set_location(self, location):
         self.location = location
@@ -0,0 +1,209 @@
+import numpy as np
+
+from .environment import FORWARD_DELTA
+from .line_of_fire import in_line_of_fire, wumpus_index
+from .world_generator import draw_placements, neighbours, pit_count
+
+
+# Index in this list is the action code accepted by BatchEnvironment.step
+ACTIONS = ['f', 'l', 'r', 'g', 'c', 's']
+NOOP = -1
+
+FORWARD, TURN_LEFT, TURN_RIGHT, GRAB, CLIMB, SHOOT = range(len(ACTIONS))
+
+# Row/column deltas per orientation index as arrays
+ROW_DELTA, COL_DELTA = np.array(FORWARD_DELTA).T
+
+
+def encode_actions(actions):
+    """
+    Convert a sequence of action characters ('f', 'l', ...) to action codes.
+    None or unknown actions are encoded as NOOP.
+    """
+    codes = {a: i for i, a in enumerate(ACTIONS)}
+    return np.array([codes.get(a, NOOP) for a in actions], dtype=np.int8)
+
+
+class BatchEnvironment:
+    """
+    N independent wumpus worlds stepped together with array operations.
+
+    World layout is stored as boolean arrays of shape (N, H, W) and agent
+    state as arrays of shape (N,). Rules follow Environment.get_percepts.
+    """
+
+    def __init__(self, n_worlds, width=4, height=4, pit_prob=0.2,
+                 allow_climb_without_gold=False, seed=None):
+        self.n_worlds = n_worlds
+        self.width = width
+        self.height = height
+        self.pit_prob = pit_prob
+        self.allow_climb_without_gold = allow_climb_without_gold
+
+        if self.pit_count() + 2 > width * height - 1:
+            raise ValueError("Grid too small for pits, wumpus and gold")
+
+        self.rng = np.random.default_rng(seed)
+
+        shape = (n_worlds, height, width)
+        self.pits = np.zeros(shape, dtype=bool)
+        self.wumpus = np.zeros(shape, dtype=bool)
+        self.gold = np.zeros(shape, dtype=bool)
+        self.breeze = np.zeros(shape, dtype=bool)
+        self.stench = np.zeros(shape, dtype=bool)
+        self.visited = np.zeros(shape, dtype=bool)
+
+        # Wumpus column in each row and row in each column, -1 if none
+        self.wumpus_row_index = np.full((n_worlds, height), -1, dtype=np.int32)
+        self.wumpus_col_index = np.full((n_worlds, width), -1, dtype=np.int32)
+
+        self.row = np.zeros(n_worlds, dtype=np.int32)
+        self.col = np.zeros(n_worlds, dtype=np.int32)
+        self.orientation = np.zeros(n_worlds, dtype=np.int8)
+        self.arrows = np.zeros(n_worlds, dtype=np.int8)
+        self.points = np.zeros(n_worlds, dtype=np.int64)
+        self.dead = np.zeros(n_worlds, dtype=bool)
+        self.exited = np.zeros(n_worlds, dtype=bool)
+        self.wumpus_dead = np.zeros(n_worlds, dtype=bool)
+        self.gold_grabbed = np.zeros(n_worlds, dtype=bool)
+
+        self._world_idx = np.arange(n_worlds)
+
+        self._set_environment(self._world_idx)
+
+    def reset(self, seed=None, worlds=None):
+        """
+        Draw new layouts for the given world indices, all worlds by default.
+        seed reseeds the generator first.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._set_environment(self._world_idx if worlds is None else np.asarray(worlds))
+
+    def pit_count(self):
+        return pit_count(self.height, self.width, self.pit_prob)
+
+    def _set_environment(self, worlds):
+        """
+        Draw new layouts and reset agent state for the given world indices
+        """
+        n = len(worlds)
+        size = self.height * self.width
+
+        pit_cells, wumpus_cell, gold_cell = draw_placements(
+            self.rng, n, self.height, self.width, self.pit_count())
+        rows = np.arange(n)
+        pits = np.zeros((n, size), dtype=bool)
+        np.put_along_axis(pits, pit_cells, True, axis=1)
+        wumpus = np.zeros((n, size), dtype=bool)
+        wumpus[rows, wumpus_cell] = True
+        gold = np.zeros((n, size), dtype=bool)
+        gold[rows, gold_cell] = True
+
+        shape = (n, self.height, self.width)
+        self.pits[worlds] = pits.reshape(shape)
+        self.wumpus[worlds] = wumpus.reshape(shape)
+        self.gold[worlds] = gold.reshape(shape)
+        self.breeze[worlds] = neighbours(self.pits[worlds])
+        self.stench[worlds] = neighbours(self.wumpus[worlds])
+        self.visited[worlds] = False
+        self.visited[worlds, 0, 0] = True
+
+        self.wumpus_row_index[worlds], self.wumpus_col_index[worlds] = \
+            wumpus_index(self.wumpus[worlds])
+
+        self.row[worlds] = 0
+        self.col[worlds] = 0
+        self.orientation[worlds] = 0
+        self.arrows[worlds] = 1
+        self.points[worlds] = 0
+        self.dead[worlds] = False
+        self.exited[worlds] = False
+        self.wumpus_dead[worlds] = False
+        self.gold_grabbed[worlds] = False
+
+    def done(self):
+        return self.dead | self.exited
+
+    def observe(self, bump=None):
+        """
+        Percepts of every world at the current agent locations
+        """
+        idx = self._world_idx
+        if bump is None:
+            bump = np.zeros(self.n_worlds, dtype=bool)
+        return {
+            "stench": self.stench[idx, self.row, self.col],
+            "breeze": self.breeze[idx, self.row, self.col],
+            "glitter": self.gold[idx, self.row, self.col],
+            "bump": bump,
+            "scream": self.wumpus_dead.copy(),
+        }
+
+    def _wumpus_in_line_of_fire(self, shooting):
+        return shooting & in_line_of_fire(
+            self.wumpus_row_index, self.wumpus_col_index, self.row, self.col, self.orientation)
+
+    def step(self, actions):
+        """
+        Apply one action code per world. Worlds that are already finished
+        are left untouched and get a reward of 0.
+
+        Returns (percepts, rewards), percepts being a dict of (N,) arrays
+        """
+        actions = np.asarray(actions)
+        if actions.shape != (self.n_worlds,):
+            raise ValueError(
+                f"Expected actions of shape ({self.n_worlds},), got {actions.shape}")
+
+        idx = self._world_idx
+        active = ~self.done()
+        rewards = np.where(active & (actions != NOOP), -1, 0)
+
+        # Forward
+        forward = active & (actions == FORWARD)
+        new_row = self.row + ROW_DELTA[self.orientation]
+        new_col = self.col + COL_DELTA[self.orientation]
+        outside = (new_row < 0) | (new_row >= self.height) | \
+            (new_col < 0) | (new_col >= self.width)
+        bump = forward & outside
+        moved = forward & ~outside
+        self.row = np.where(moved, new_row, self.row)
+        self.col = np.where(moved, new_col, self.col)
+        self.visited[idx[moved], self.row[moved], self.col[moved]] = True
+
+        fell = moved & self.pits[idx, self.row, self.col]
+        eaten = moved & self.wumpus[idx, self.row, self.col] & ~self.wumpus_dead
+        rewards -= 1000 * fell + 1000 * eaten
+        self.dead |= fell | eaten
+
+        # Turns
+        self.orientation = np.where(
+            active & (actions == TURN_LEFT), (self.orientation - 1) % 4, self.orientation)
+        self.orientation = np.where(
+            active & (actions == TURN_RIGHT), (self.orientation + 1) % 4, self.orientation)
+
+        # Shoot, scream is perceived on the same step
+        shoot = active & (actions == SHOOT)
+        rewards -= 9 * shoot
+        shooting = shoot & (self.arrows > 0)
+        self.arrows -= shooting
+        self.wumpus_dead |= self._wumpus_in_line_of_fire(shooting)
+
+        # Glitter is perceived before the gold is taken
+        percepts = self.observe(bump)
+
+        # Grab
+        grab = active & (actions == GRAB) & percepts["glitter"] & ~self.gold_grabbed
+        self.gold_grabbed |= grab
+        self.gold[idx[grab], self.row[grab], self.col[grab]] = False
+
+        # Climb
+        at_start = active & (actions == CLIMB) & (self.row == 0) & (self.col == 0)
+        rewards += 1000 * (at_start & self.gold_grabbed)
+        self.exited |= at_start & (
+            self.gold_grabbed | self.allow_climb_without_gold)
+
+        self.points += rewards
+
+        return percepts, rewards
@@ -2,12 +2,68 @@ import numpy as np
 
 from .agent_state import AgentState
 
-from .room import Room
+from .room import Room, PIT, WUMPUS, GLITTER, BREEZE, STENCH, VISITED
+from .line_of_fire import in_line_of_fire, wumpus_index
+from .world_generator import draw_layouts, layouts_to_cells, pit_count
+
+
+# Order of the percepts in the observation arrays returned by reset and step
+PERCEPTS = ('stench', 'breeze', 'glitter', 'bump', 'scream')
+
+# Bits of the packed percepts returned by step_packed, in PERCEPTS order
+STENCH_BIT, BREEZE_BIT, GLITTER_BIT, BUMP_BIT, SCREAM_BIT = (1 << i for i in range(len(PERCEPTS)))
+
+# Row/column step when moving forward per orientation index (right, down,
+# left, up), same convention as AgentState.orientations
+FORWARD_DELTA = ((0, 1), (-1, 0), (0, -1), (1, 0))
+
+
+def cell_percepts(cells):
+    """
+    Packed stench, breeze and glitter percepts of every cell of a cells array
+    """
+    return ((cells & STENCH > 0) * STENCH_BIT | (cells & BREEZE > 0) * BREEZE_BIT |
+            (cells & GLITTER > 0) * GLITTER_BIT)
+
+
+def unpack_percepts(percepts, points):
+    """
+    Percepts dict of get_percepts from packed percepts
+    """
+    return {
+        "stench": bool(percepts & STENCH_BIT),
+        "breeze": bool(percepts & BREEZE_BIT),
+        "glitter": bool(percepts & GLITTER_BIT),
+        "bump": bool(percepts & BUMP_BIT),
+        "scream": bool(percepts & SCREAM_BIT),
+        "points": points,
+    }
+
+
+def pack_percepts(percepts):
+    """
+    Packed percepts of a get_percepts dict, the inverse of unpack_percepts
+    """
+    return int((percepts["stench"] and STENCH_BIT) | (percepts["breeze"] and BREEZE_BIT) |
+               (percepts["glitter"] and GLITTER_BIT) | (percepts["bump"] and BUMP_BIT) |
+               (percepts["scream"] and SCREAM_BIT))
+
+
+def percepts_to_observation(percepts):
+    return np.array([percepts[name] for name in PERCEPTS], dtype=bool)
 
 
 class Environment:
-    def __init__(self, width=4, height=4, allowClimbWithoutGold=False, pitProb=0.2, debug=False):
+    def __init__(self, width=4, height=4, allowClimbWithoutGold=False, pitProb=0.2, debug=False,
+                 seed=None, layout=None):
+        """
+        seed seeds the generator drawing the worlds, an int or a
+        np.random.SeedSequence. layout is a (height, width) uint8 array of
+        PIT, WUMPUS and GLITTER flags to play instead of a random world,
+        see from_layout.
+        """
         self.agent_state = None
+        self.cells = None
         self.gridHeight = height
         self.gridWidth = width
         self.allowClimbWithoutGold = allowClimbWithoutGold
@@ -17,66 +73,114 @@ class Environment:
 
         self.wumpus_dead = False
         self.gold_grabbed = False
+        self.steps = 0
+        self.max_steps = None
 
-        self.__set_environment()
-        self.__init_agent_state()
-
-    def __set_environment(self):
-        self.grid = self.__init_empty_grid()
-
-        pits = self._draw_room(self.pit_count(), [])
-        for p in pits:
-            self.grid.flat[p].has_pit = True
+        self._rng = np.random.default_rng(seed)
 
-            left = self.left_idx(p)
-            if left > -1:
-                self.grid.flat[left].has_breeze = True
-
-            right = self.right_idx(p)
-            if right > -1:
-                self.grid.flat[right].has_breeze = True
-
-            bottom = self.bottom_idx(p)
-            if bottom > -1:
-                self.grid.flat[bottom].has_breeze = True
+        self.__set_environment(layout)
+        self.__init_agent_state()
 
-            top = self.top_idx(p)
-            if top > -1:
-                self.grid.flat[top].has_breeze = True
+    @classmethod
+    def from_layout(cls, layout, allowClimbWithoutGold=False, pitProb=None, debug=False):
+        """
+        Environment playing a fixed world, layout being a (height, width)
+        array with the PIT, WUMPUS and GLITTER flags of each cell. Breeze and
+        stench are derived from it. pitProb is the probability the world was
+        drawn with, the share of pits in the layout by default.
+        """
+        layout = np.asarray(layout, dtype=np.uint8)
+        height, width = layout.shape
+        if pitProb is None:
+            pitProb = np.count_nonzero(layout & PIT) / (layout.size - 1)
+        return cls(width, height, allowClimbWithoutGold, pitProb, debug, layout=layout)
 
-        wumpus = self._draw_room(1, pits)
-        wumpus_loc = wumpus[0]
-        self.grid.flat[wumpus_loc].has_wumpus = True
+    def reset(self, seed=None, max_steps=None):
+        """
+        Draw a new world and put the agent back at (0, 0), reusing the
+        cells array and the agent state. seed reseeds the world generator,
+        the episode is truncated after max_steps steps if set.
 
-        left = self.left_idx(wumpus_loc)
-        if left > -1:
-            self.grid.flat[left].has_stench = True
+        Returns (observation, info) like step
+        """
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        self.max_steps = max_steps
+        self.steps = 0
+        self.wumpus_dead = False
+        self.gold_grabbed = False
 
-        right = self.right_idx(wumpus_loc)
-        if right > -1:
-            self.grid.flat[right].has_stench = True
+        self.__set_environment()
+        self.agent_state.reset()
 
-        bottom = self.bottom_idx(wumpus_loc)
-        if bottom > -1:
-            self.grid.flat[bottom].has_stench = True
+        percepts = self.get_percepts()
+        return percepts_to_observation(percepts), self._info(percepts)
 
-        top = self.top_idx(wumpus_loc)
-        if top > -1:
-            self.grid.flat[top].has_stench = True
+    def step(self, action):
+        """
+        Apply one action ('f', 'l', 'r', 'g', 'c' or 's').
 
-        gold = self._draw_room(1, np.append(pits, wumpus))
+        Returns (observation, reward, terminated, truncated, info), the
+        observation being a boolean array ordered as PERCEPTS
+        """
+        percepts = self.get_percepts(action)
+        self.steps += 1
+
+        terminated = self.agent_state.is_dead() or self.agent_state.exited()
+        truncated = not terminated and self.max_steps is not None and \
+            self.steps >= self.max_steps
+        return (percepts_to_observation(percepts), percepts["points"],
+                terminated, truncated, self._info(percepts))
+
+    def _info(self, percepts):
+        return {
+            "percepts": percepts,
+            "points": self.agent_state.points(),
+            "location": self.agent_state.location,
+            "orientation": self.agent_state.orientation,
+            "steps": self.steps,
+        }
+
+    def __set_environment(self, layout=None):
+        if layout is None:
+            layout = draw_layouts(self._rng, 1, self.gridHeight, self.gridWidth, self.pitProb)[0]
+        else:
+            if layout.shape != (self.gridHeight, self.gridWidth):
+                raise ValueError(
+                    f"Layout of shape {layout.shape} for a {self.gridHeight}x{self.gridWidth} grid")
+            if np.count_nonzero(layout & WUMPUS) != 1 or np.count_nonzero(layout & GLITTER) != 1:
+                raise ValueError("Layout needs exactly one wumpus and one gold")
+
+        # One uint8 of bit flags per cell, see room.py
+        cells = layouts_to_cells(layout[None])[0]
+        if self.cells is None:
+            self.cells = cells
+        else:
+            self.cells[...] = cells
 
-        self.grid.flat[gold[0]].has_glitter = True
+        # Packed percepts of each cell, a list as it is indexed one at a time
+        self._cell_percepts = cell_percepts(cells).ravel().tolist()
 
-        self.grid[0, 0].visited = True
+        # Wumpus column in each row and row in each column for shooting
+        row_index, col_index = wumpus_index(cells[None] & WUMPUS > 0)
+        self._wumpus_row_index = row_index[0].tolist()
+        self._wumpus_col_index = col_index[0].tolist()
 
-    def __init_empty_grid(self):
+    @property
+    def grid(self):
+        """
+        Object array of read-only Room views, kept for compatibility.
+        Use cells or room() instead.
+        """
         grid = np.empty((self.gridHeight, self.gridWidth), dtype=object)
         for i in range(0, self.gridHeight):
             for j in range(0, self.gridWidth):
-                grid[i, j] = Room()
+                grid[i, j] = Room(self.cells, (i, j))
         return grid
 
+    def room(self, location):
+        return Room(self.cells, location)
+
     def right_idx(self, index):
         # returns flat index next to index if exists
         right = index + 1
@@ -109,27 +213,25 @@ class Environment:
         return bottom
 
     def pit_count(self):
-        return int(self.pitProb * (self.gridHeight * self.gridWidth - 1))
-
-    def _draw_room(self, count, exclude=[]):
-        choices = np.arange(1, self.grid.size)
-        choices = np.setdiff1d(choices, exclude)
-        return np.random.choice(choices, count, replace=False)
+        return pit_count(self.gridHeight, self.gridWidth, self.pitProb)
 
     def _is_pit(self, index):
-        return self.grid.item(index).has_pit
+        return bool(self.cells.item(index) & PIT)
 
     def _is_wumpus(self, index):
-        return self.grid.item(index).has_wumpus
+        return bool(self.cells.item(index) & WUMPUS)
 
     def _is_gold(self, index):
-        return self.grid.item(index).has_glitter
+        return bool(self.cells.item(index) & GLITTER)
 
     def _is_breeze(self, index):
-        return self.grid.item(index).has_breeze
+        return bool(self.cells.item(index) & BREEZE)
 
     def _is_stench(self, index):
-        return self.grid.item(index).has_stench
+        return bool(self.cells.item(index) & STENCH)
+
+    def _is_visited(self, index):
+        return bool(self.cells.item(index) & VISITED)
 
     def _get_next_loc(self, location, orientation):
         if (orientation == 0):  # Right
@@ -147,42 +249,16 @@ class Environment:
 
     def _shoot_wumpus(self, from_loc, direction):
         if self.agent_state.arrows <= 0:
-            print("No more arrows...")
+            if self._debug:
+                print("No more arrows...")
             return False
 
         self.agent_state.arrows -= 1
-        if direction == 'left':
-            for n in reversed(range(0, from_loc[1])):
-                room = self.grid.item((from_loc[0], n))
-                if room.has_wumpus:
-                    self.wumpus_dead = True
-                    self.room_has_humpus = False
-                    return True
-
-        elif direction == 'right':
-            for n in range(from_loc[1], self.gridWidth):
-                room = self.grid.item((from_loc[0], n))
-                if room.has_wumpus:
-                    self.wumpus_dead = True
-                    self.room_has_humpus = False
-                    return True
-
-        elif direction == 'up':
-            for n in range(from_loc[0], self.gridHeight):
-                room = self.grid.item((n, from_loc[1]))
-                if room.has_wumpus:
-                    self.wumpus_dead = True
-                    self.room_has_humpus = False
-                    return True
-
-        elif direction == 'down':
-            for n in reversed(range(from_loc[0], self.gridHeight)):
-                room = self.grid.item((n, from_loc[1]))
-                if room.has_wumpus:
-                    self.wumpus_dead = True
-                    self.room_has_humpus = False
-                    return True
-
+        orientation = self.agent_state.orientations.index(direction)
+        if in_line_of_fire(self._wumpus_row_index, self._wumpus_col_index,
+                           from_loc[0], from_loc[1], orientation):
+            self.wumpus_dead = True
+            return True
         return False
 
     def print_grid(self):
@@ -193,9 +269,8 @@ class Environment:
             print(("+" + "-" * padding) * self.gridWidth + "+")
             row = "|"
             for j in range(self.gridWidth):
-                # item = self.grid.item((i, j))
                 element = ''
-                if (self.grid.item(i, j).visited) or self._debug:
+                if self._is_visited((i, j)) or self._debug:
                     element += 'v'
                     if self._is_pit((i, j)):
                         element += 'P'
@@ -228,117 +303,93 @@ class Environment:
     def __init_agent_state(self):
         self.agent_state = AgentState()
 
-    def get_percepts(self, action=None):
-        percepts = {}
+    def step_packed(self, action=None):
+        """
+        Apply an action and return (percepts, points), percepts packed as
+        the *_BIT flags. This is the fast path of get_percepts.
+        """
+        state = self.agent_state
+        row, col = state.location
+        bump = 0
+
         if action == "f":  # forward
-            newloc = self._get_next_loc(
-                self.agent_state.location, self.agent_state.orientation)
-            if self._will_hit_wall(newloc):
-                # Redundant but just to make sure it's not changed
-                self.agent_state.set_location(self.agent_state.location)
-                room = self.grid.item(self.agent_state.location)
-                percepts["stench"] = room.has_stench
-                percepts["breeze"] = room.has_breeze
-                percepts["glitter"] = room.has_glitter
-                percepts["bump"] = True
-                percepts["scream"] = self.wumpus_dead
-                percepts["points"] = -1
+            points = -1
+            row_delta, col_delta = FORWARD_DELTA[state.orientation]
+            new_row, new_col = row + row_delta, col + col_delta
+            if 0 <= new_row < self.gridHeight and 0 <= new_col < self.gridWidth:
+                row, col = new_row, new_col
+                state.set_location((row, col))
+                cell = self.cells.item(row, col)
+                if cell & PIT:
+                    points += -1000
+                    state.kill()
+                if cell & WUMPUS and not self.wumpus_dead:
+                    points += -1000
+                    state.kill()
+                self.cells[row, col] = cell | VISITED
             else:
-                # New location
-                self.agent_state.set_location(newloc)
-                room = self.grid.item(newloc)
-                percepts["stench"] = room.has_stench
-                percepts["breeze"] = room.has_breeze
-                percepts["glitter"] = room.has_glitter
-                percepts["bump"] = False
-                percepts["scream"] = self.wumpus_dead
-                percepts["points"] = -1
-
-                if room.has_pit:
-                    percepts["points"] += -1000
-                    self.agent_state.kill()
-
-                if room.has_wumpus and not self.wumpus_dead:
-                    percepts["points"] += -1000
-                    self.agent_state.kill()
-
-                room.visited = True
+                bump = BUMP_BIT
 
         elif action == "l":  # turn left
-            self.agent_state.turn_left()
-            room = self.grid.item(self.agent_state.location)
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = -1
+            points = -1
+            state.turn_left()
 
         elif action == "r":  # turn right
-            self.agent_state.turn_right()
-            room = self.grid.item(self.agent_state.location)
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = -1
-
-        elif action == "g":  # grab gold
-            room = self.grid.item(self.agent_state.location)
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = -1
-
-            if percepts["glitter"] and not self.gold_grabbed:
-                self.gold_grabbed = True
-                room.has_glitter = False
+            points = -1
+            state.turn_right()
+
+        elif action == "g":  # grab gold, glitter is still perceived
+            points = -1
 
         elif action == "c":  # Climb
-            room = self.grid.item(self.agent_state.location)
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = -1
-
-            if self.agent_state.location == (0, 0):
+            points = -1
+            if row == 0 and col == 0:
                 if self.gold_grabbed:
-                    percepts["points"] += 1000
-                    self.agent_state.increment_points(percepts["points"])
-                    self.agent_state.exit()
-
+                    points += 1000
+                    state.exit()
                 elif self.allowClimbWithoutGold:
-                    self.agent_state.exit()
+                    state.exit()
 
         elif action == "s":  # Shoot
-            room = self.grid.item(self.agent_state.location)
-            direction = self.agent_state.orientations[self.agent_state.orientation]
-            self._shoot_wumpus(self.agent_state.location, direction)
-
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = -10
+            points = -10
+            self._shoot_wumpus(state.location, state.orientations[state.orientation])
 
         else:
-            room = self.grid.item(self.agent_state.location)
-            percepts["stench"] = room.has_stench
-            percepts["breeze"] = room.has_breeze
-            percepts["glitter"] = room.has_glitter
-            percepts["bump"] = False
-            percepts["scream"] = self.wumpus_dead
-            percepts["points"] = 0
+            points = 0
 
-        self.agent_state.increment_points(percepts["points"])
+        index = row * self.gridWidth + col
+        percepts = self._cell_percepts[index] | bump
+        if self.wumpus_dead:
+            percepts |= SCREAM_BIT
 
-        return percepts
+        if action == "g" and percepts & GLITTER_BIT and not self.gold_grabbed:
+            self.gold_grabbed = True
+            self.cells[row, col] &= ~np.uint8(GLITTER)
+            self._cell_percepts[index] &= ~GLITTER_BIT
+
+        state.increment_points(points)
+        return percepts, points
+
+    def get_percepts(self, action=None):
+        return unpack_percepts(*self.step_packed(action))
+
+    def snapshot(self):
+        """
+        Copy of the state steps change, to go back to with restore
+        """
+        return (self.cells.copy(), list(self._cell_percepts), self.wumpus_dead,
+                self.gold_grabbed, self.steps, dict(vars(self.agent_state)))
+
+    def restore(self, snapshot):
+        """
+        Go back to a snapshot of this environment, keeping the agent state
+        object
+        """
+        cells, cell_percepts, self.wumpus_dead, self.gold_grabbed, self.steps, agent_state = \
+            snapshot
+        self.cells[...] = cells
+        self._cell_percepts = list(cell_percepts)
+        vars(self.agent_state).update(agent_state)
 
     def get_agent_state(self):
         return self.agent_state
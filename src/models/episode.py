@@ -1,21 +1,87 @@
 import time
 import numpy as np
+from dataclasses import dataclass
 
 from .environment import Environment
-from .agent.naive_agent import NaiveAgent
-from .agent.human_agent import HumanAgent
-from .agent.proba_agent import ProbaAgent
-from .agent.move_planning_agent import MovePlanningAgent
+from .agent.registry import AgentContext, create_agent
+
+
+ACTIONS = {'f': 'Forward', 'l': 'TurnLeft',
+           'r': 'Turning Right', 's': 'Shooting wumpus', 'g': 'Grabbing gold', 'c': 'Climbing up'}
+
+
+@dataclass
+class EpisodeResult:
+    score: int
+    steps: int
+    outcome: str  # 'died', 'exited' or 'max_steps'
+    gold_grabbed: bool
+    arrow_used: bool
+
+
+class EpisodeObserver:
+    """
+    Opt-in hooks called by Episode.play. Override only what is needed.
+    """
+
+    def on_percepts(self, episode, percepts):
+        pass
+
+    def on_action(self, episode, action):
+        pass
+
+    def on_end(self, episode, result):
+        pass
+
+
+class ConsoleRenderer(EpisodeObserver):
+    """
+    Prints the grid and percepts on every step
+    """
+
+    def on_percepts(self, episode, percepts):
+        episode.environment.print_grid()
+        print(f"Observed: {percepts}")
+        if episode.debug:
+            agent_state = episode.agent_state
+            print(f"Current loc: {agent_state.location}")
+            print(
+                f"facing: {agent_state.orientations[agent_state.orientation]}")
+            print(f"Points: {agent_state.points()}")
+
+    def on_action(self, episode, action):
+        print(f"{ACTIONS[action[0]]} ...")
+
+    def on_end(self, episode, result):
+        episode.environment.print_grid()
+        if result.outcome == 'died':
+            print(f"Agent died with {result.score} points")
+        elif result.outcome == 'exited':
+            print(f"Agent exited with {result.score} points.")
+        else:
+            print(f"Agent stopped after {result.steps} steps with {result.score} points.")
 
 
 class Episode:
-    def __init__(self, debug):
+    def __init__(self, debug, width=4, height=None, pit_proba=0.2, seed=None, layout=None):
+        """
+        seed, an int or a np.random.SeedSequence, seeds both the world and
+        the agent. layout plays a fixed world instead, see
+        Environment.from_layout.
+        """
         self.debug = debug
-        self.grid_width = 4
-        self.gridth_height = self.grid_width
-        self.pit_proba = 0.2
-        self.environment = Environment(
-            self.grid_width, self.gridth_height, True, self.pit_proba, debug=debug)
+        seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        world_seed, agent_seed = seed_seq.spawn(2)
+        self.rng = np.random.default_rng(agent_seed)
+
+        if layout is None:
+            self.environment = Environment(
+                width, height or width, True, pit_proba, debug=debug, seed=world_seed)
+        else:
+            self.environment = Environment.from_layout(layout, True, pit_proba, debug=debug)
+        self.grid_width = self.environment.gridWidth
+        self.grid_height = self.environment.gridHeight
+        self.pit_proba = pit_proba
         self.agent_state = self.environment.get_agent_state()
 
         self.oldloc = (0, 0)
@@ -23,45 +89,107 @@ class Episode:
         self.orientation_idx = 0
         self.points = 0
         self.grabbed_gold = False
+        self.steps = 0
+
+        self.agent = None
+        self.agent_type = None
+        self.agent_action = None
+        self.observer = None
+        self.max_steps = None
+        self.result = None
+        self._percepts = None
+
+    def _create_agent(self, agent_type, verbose, agent_params):
+        # Agent modules are imported on first use, see agent/registry.py
+        context = AgentContext(self.agent_state, self.grid_width, self.grid_height,
+                               self.pit_proba, self.rng, verbose)
+        return create_agent(agent_type, context, **(agent_params or {}))
+
+    def _result(self, outcome):
+        return EpisodeResult(
+            score=self.agent_state.points(),
+            steps=self.steps,
+            outcome=outcome,
+            gold_grabbed=self.environment.gold_grabbed,
+            arrow_used=self.agent_state.arrows < 1)
+
+    def reset(self, agent_type='naive', observer=None, max_steps=None, verbose=False,
+              agent_params=None):
+        """
+        Create the agent and observe the first percepts. Returns the result
+        if the episode is already over, None otherwise. agent_type is a type
+        of agent/registry.py, agent_params the parameters of its factory.
+        """
+        self.agent = self._create_agent(agent_type, verbose, agent_params)
+        self.agent_type = agent_type
+        self.observer = observer
+        self.max_steps = max_steps
+        self.steps = 0
+        self.result = None
+
+        self._observe(None)
+        return self.result
+
+    def step(self, action=None):
+        """
+        Play one agent action. Returns the EpisodeResult once the episode is
+        over, None before. action is played instead of the agent's choice,
+        e.g. to replay recorded actions; the agent still chooses and its
+        choice is kept in agent_action.
+        """
+        if self.result is not None:
+            return self.result
+
+        self.agent_action = self.agent.next_step(self._percepts)[0]
+        if action is None:
+            action = self.agent_action
+        self.steps += 1
+        if self.observer:
+            self.observer.on_action(self, action)
+
+        self._observe(action)
+        self.agent.observe(action, self._percepts)
+        return self.result
+
+    def close(self):
+        """
+        Release what the agent holds, the result stays available
+        """
+        if self.agent is not None:
+            self.agent.close()
+            self.agent = None
+
+    def _observe(self, action):
+        self._percepts = self.environment.get_percepts(action)
+        if self.observer:
+            self.observer.on_percepts(self, self._percepts)
+
+        if self.agent_state.is_dead():
+            self.result = self._result('died')
+        elif self.agent_state.exited():
+            self.result = self._result('exited')
+        elif self.max_steps is not None and self.steps >= self.max_steps:
+            self.result = self._result('max_steps')
+
+        if self.result is not None and self.observer:
+            self.observer.on_end(self, self.result)
+
+    def play(self, agent_type='naive', observer=None, max_steps=None, verbose=False,
+             agent_params=None):
+        """
+        Run the episode without any rendering unless an observer is given.
+        Stops after max_steps actions if set.
+        """
+        result = self.reset(agent_type, observer, max_steps, verbose, agent_params)
+        try:
+            while result is None:
+                result = self.step()
+        finally:
+            self.close()
+        return result
 
     def run(self, agent_type='naive'):
         print(f"Running episode with {agent_type} agent...")
 
-        actions = {'f': 'Forward', 'l': 'TurnLeft',
-                   'r': 'Turning Right', 's': 'Shooting wumpus', 'g': 'Grabbing gold', 'c': 'Climbing up'}
-
-        if agent_type == 'naive':
-            choices = ['f', 'l', 'r', 's', 'g', 'c']
-            agent = NaiveAgent(choices)
-        elif agent_type == 'move_planning':
-            choices = ['f', 'l', 'r', 's']  # remove grab and climb
-            agent = MovePlanningAgent(choices, self.agent_state)
-        elif agent_type == 'proba_agent':
-            agent = ProbaAgent(
-                list(actions.keys()), self.agent_state, self.grid_width, self.pit_proba)
-        else:
-            agent = HumanAgent(list(actions.keys()))
-
-        action = None
-        while True:
-            percepts = self.environment.get_percepts(action)
-            self.environment.print_grid()
-            print(f"Observed: {percepts}")
-            if self.debug:
-                print(f"Current loc: {self.agent_state.location}")
-                print(
-                    f"facing: {self.agent_state.orientations[self.agent_state.orientation]}")
-                print(f"Points: {self.agent_state.points()}")
-            if self.agent_state.is_dead():
-                self.environment.print_grid()
-                print(
-                    f"Agent died with {self.agent_state.points()} points")
-                return self.agent_state.points()
-
-            if self.agent_state.exited():
-                self.environment.print_grid()
-                print(f"Agent exited with {self.agent_state.points()} points.")
-                return self.agent_state.points()
-
-            action = agent.next_step(percepts)[0]
-            print(f"{actions[action[0]]} ...")
+        result = self.play(agent_type, ConsoleRenderer(), verbose=True)
+        return result.score
@@ -0,0 +1,169 @@
+import itertools
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+def z_value(confidence):
+    """
+    Two-sided standard normal quantile of a confidence level
+    """
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def mean_interval(values, confidence=0.95):
+    """
+    (mean, low, high) normal interval of the mean of values
+    """
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, -math.inf, math.inf
+    half_width = z_value(confidence) * float(values.std(ddof=1)) / math.sqrt(len(values))
+    return mean, mean - half_width, mean + half_width
+
+
+def wilson_interval(successes, n, confidence=0.95):
+    """
+    (rate, low, high) Wilson score interval of a proportion, which unlike the
+    normal interval stays in [0, 1] and is usable for rates near 0 or 1
+    """
+    if n == 0:
+        return 0.0, 0.0, 1.0
+    z = z_value(confidence)
+    rate = successes / n
+    center = (rate + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = z / (1 + z * z / n) * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n))
+    return rate, max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def episodes_for_width(stdev, width, confidence=0.95):
+    """
+    Episodes for a normal interval of the given full width
+    """
+    if width <= 0:
+        return math.inf
+    return math.ceil((2 * z_value(confidence) * stdev / width) ** 2)
+
+
+class SequentialEvaluation:
+    """
+    Results of agents playing the same worlds, added batch by batch, with
+    the stopping rules of an adaptive evaluation: stop once the intervals
+    of the mean score, and of the win and death rates if rate_width is set,
+    are narrower than the targets, or once every pair of agents is
+    separated, or after max_episodes.
+
+    Agents play the same worlds (common random numbers), so pairs are
+    compared on the per-world score differences, whose variance is much
+    lower than that of the scores. Checking separation after every batch
+    is a repeated test: look k uses a confidence of 1 - alpha / 2^k, so
+    that all looks together keep the error rate under alpha.
+    """
+
+    def __init__(self, agents, score_width, rate_width=None, confidence=0.95,
+                 max_episodes=100000, min_batch=200):
+        self.agents = list(agents)
+        self.score_width = score_width
+        self.rate_width = rate_width
+        self.confidence = confidence
+        self.max_episodes = max_episodes
+        self.min_batch = min_batch
+        self.looks = 0
+
+        self.scores = {agent: np.zeros(0) for agent in self.agents}
+        self.won = {agent: np.zeros(0, dtype=bool) for agent in self.agents}
+        self.died = {agent: np.zeros(0, dtype=bool) for agent in self.agents}
+
+    def add(self, agent, results):
+        """
+        Results of benchmark.run_episodes, in the order of the worlds
+        """
+        self.scores[agent] = np.append(self.scores[agent], [r['score'] for r in results])
+        self.won[agent] = np.append(self.won[agent], [r['won'] for r in results])
+        self.died[agent] = np.append(self.died[agent], [r['died'] for r in results])
+
+    def episodes(self):
+        return min(len(scores) for scores in self.scores.values())
+
+    def intervals(self, agent):
+        n = len(self.scores[agent])
+        return {
+            'score': mean_interval(self.scores[agent], self.confidence),
+            'win_rate': wilson_interval(int(self.won[agent].sum()), n, self.confidence),
+            'death_rate': wilson_interval(int(self.died[agent].sum()), n, self.confidence),
+        }
+
+    def difference(self, a, b, confidence=None):
+        """
+        (mean, low, high) interval of the score of a minus that of b, from
+        the differences on the worlds both played
+        """
+        n = min(len(self.scores[a]), len(self.scores[b]))
+        return mean_interval(self.scores[a][:n] - self.scores[b][:n],
+                             confidence or self.confidence)
+
+    def separated(self, a, b):
+        """
+        Whether the scores of a and b differ at the confidence of the
+        current look
+        """
+        alpha = (1 - self.confidence) / 2 ** max(self.looks, 1)
+        _, low, high = self.difference(a, b, 1 - alpha)
+        return low > 0 or high < 0
+
+    def _precise(self, agent):
+        intervals = self.intervals(agent)
+        widths = [intervals['score'][2] - intervals['score'][1]]
+        targets = [self.score_width]
+        if self.rate_width is not None:
+            widths += [intervals[name][2] - intervals[name][1] for name in ('win_rate', 'death_rate')]
+            targets += [self.rate_width] * 2
+        return all(width <= target for width, target in zip(widths, targets))
+
+    def _needed(self, agent):
+        """
+        Episodes the agent needs for the target widths at the current
+        variance estimates
+        """
+        n = len(self.scores[agent])
+        needed = episodes_for_width(self.scores[agent].std(ddof=1), self.score_width,
+                                    self.confidence) if n > 1 else 0
+        if self.rate_width is not None:
+            for outcomes in (self.won[agent], self.died[agent]):
+                # Rates of 0 or 1 so far are not known to be exact
+                rate = min(max(outcomes.mean(), 1 / (n + 1)), n / (n + 1)) if n else 0.5
+                needed = max(needed, episodes_for_width(
+                    math.sqrt(rate * (1 - rate)), self.rate_width, self.confidence))
+        return needed
+
+    def stop_reason(self):
+        """
+        'precise', 'separated' or 'max_episodes' once the evaluation can
+        stop, None otherwise. Each call is a look at the results.
+        """
+        self.looks += 1
+        n = self.episodes()
+        if n == 0:
+            return None
+        if all(self._precise(agent) for agent in self.agents):
+            return 'precise'
+        pairs = list(itertools.combinations(self.agents, 2))
+        if pairs and all(self.separated(a, b) for a, b in pairs):
+            return 'separated'
+        if n >= self.max_episodes:
+            return 'max_episodes'
+        return None
+
+    def next_batch(self):
+        """
+        Episodes each agent plays next: what the current estimates need,
+        at least min_batch and at most as many as already played
+        """
+        n = self.episodes()
+        if n == 0:
+            return min(self.min_batch, self.max_episodes)
+        needed = max(self._needed(agent) for agent in self.agents) - n
+        return int(min(max(needed, self.min_batch), max(n, self.min_batch),
+                       self.max_episodes - n))
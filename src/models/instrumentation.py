@@ -0,0 +1,187 @@
+import functools
+import importlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+# (module, class, method) timed by default, the label is "Class.method".
+# Module names relative to this package are resolved from it.
+# Timings are inclusive: Episode.step contains the agent and environment
+# timings, ProbaAgent.next_step contains inference and planning.
+DEFAULT_TARGETS = [
+    ('.episode', 'Episode', 'step'),
+    ('.episode', 'ConsoleRenderer', 'on_percepts'),
+    ('.environment', 'Environment', 'get_percepts'),
+    ('.agent.naive_agent', 'NaiveAgent', 'next_step'),
+    ('.agent.move_planning_agent', 'MovePlanningAgent', 'next_step'),
+    ('.agent.move_planning_agent', 'MovePlanningAgent', '_plan_move_back'),
+    ('.agent.proba_agent', 'ProbaAgent', 'next_step'),
+    ('.agent.proba_agent', 'ProbaAgent', '_init_model'),
+    ('.agent.proba_agent', 'ProbaAgent', '_get_dying_probas'),
+    ('.agent.proba_agent', 'ProbaAgent', '_get_wumpus_probable_loc'),
+    ('.agent.inference', 'HazardInference', 'marginals'),
+    ('.agent.explored_map', 'ExploredMap', 'plan'),
+    ('.agent.explored_map', 'ExploredMap', 'plan_home'),
+]
+
+# (module, class, method, counter) whose calls are counted by default.
+# marginals_computed counts the BeliefState lookups that missed its cache,
+# components_computed the ExactInference component lookups that missed.
+DEFAULT_COUNTED = [
+    ('.agent.inference', 'BeliefState', 'marginals', 'marginals_lookups'),
+    ('.agent.inference', 'HazardInference', 'marginals', 'marginals_computed'),
+    ('.agent.inference', 'ExactInference', '_component_marginals', 'component_lookups'),
+    ('.agent.inference', 'ExactInference', '_compute_component', 'components_computed'),
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize_durations(durations):
+    """
+    Count, total and mean seconds and percentiles of a list of durations
+    """
+    durations = np.asarray(durations, dtype=float)
+    summary = {
+        'count': int(len(durations)),
+        'total_seconds': float(durations.sum()),
+        'mean_seconds': float(durations.mean()) if len(durations) else 0.0,
+    }
+    for p in PERCENTILES:
+        summary[f'p{p}_seconds'] = float(np.percentile(durations, p)) if len(durations) else 0.0
+    return summary
+
+
+class Instrumentation:
+    """
+    Times calls of the target methods and counts calls of the counted ones
+    while enabled. Methods are wrapped on enable and restored on disable, so
+    there is no cost otherwise.
+
+    Methods are patched on their class for the whole process and the records
+    are not synchronized: only one instance may be enabled at a time, and
+    calls from every thread are recorded into it, so profile episodes played
+    one after the other rather than with the thread scheduler.
+
+        with Instrumentation() as instrumentation:
+            result = Episode(False).play('proba_agent')
+            instrumentation.end_episode(score=result.score)
+        print(instrumentation.to_json())
+    """
+
+    # The enabled instance of the process
+    _active = None
+    _active_lock = threading.Lock()
+
+    def __init__(self, targets=None, counted=None):
+        self.targets = DEFAULT_TARGETS if targets is None else targets
+        self.counted = DEFAULT_COUNTED if counted is None else counted
+        self.durations = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.episodes = []
+        self._episode_start = {}
+        self._patched = []
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def enable(self):
+        with Instrumentation._active_lock:
+            if Instrumentation._active is self:
+                return
+            if Instrumentation._active is not None:
+                raise RuntimeError("Another Instrumentation is enabled")
+            Instrumentation._active = self
+        for module_name, class_name, method in self.targets:
+            self._patch(module_name, class_name, method,
+                        functools.partial(self._timed, f'{class_name}.{method}'))
+        for module_name, class_name, method, name in self.counted:
+            self._patch(module_name, class_name, method, functools.partial(self._counted, name))
+
+    def _patch(self, module_name, class_name, method, wrap):
+        owner = getattr(importlib.import_module(module_name, __package__), class_name)
+        original = owner.__dict__[method]
+        setattr(owner, method, wrap(original))
+        self._patched.append((owner, method, original))
+
+    def disable(self):
+        if Instrumentation._active is not self:
+            return
+        for owner, method, original in reversed(self._patched):
+            setattr(owner, method, original)
+        self._patched = []
+        Instrumentation._active = None
+
+    def _timed(self, label, function):
+        durations = self.durations[label]
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+        return timed
+
+    def _counted(self, name, function):
+        @functools.wraps(function)
+        def counted(*args, **kwargs):
+            self.counters[name] += 1
+            return function(*args, **kwargs)
+        return counted
+
+    def merge(self, durations, counters=None, episodes=None):
+        """
+        Add timings collected by another Instrumentation, e.g. in a worker
+        process
+        """
+        for label, values in durations.items():
+            self.durations[label].extend(values)
+        for name, n in (counters or {}).items():
+            self.counters[name] += n
+        self.episodes.extend(episodes or [])
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def end_episode(self, **info):
+        """
+        Close the per-episode summary of what was timed since the last
+        call: count, total and max seconds per label. Call it once the
+        episode has returned, info is stored with the summary.
+        """
+        episode = dict(info)
+        episode['timings'] = {}
+        for label, durations in self.durations.items():
+            calls = durations[self._episode_start.get(label, 0):]
+            if calls:
+                episode['timings'][label] = {
+                    'count': len(calls), 'total_seconds': sum(calls), 'max_seconds': max(calls)}
+        self._episode_start = {label: len(d) for label, d in self.durations.items()}
+        self.episodes.append(episode)
+        return episode
+
+    def summary(self):
+        """
+        Aggregate timings per label
+        """
+        return {label: summarize_durations(durations)
+                for label, durations in sorted(self.durations.items()) if durations}
+
+    def to_json(self, path=None, episodes=True):
+        report = {'timings': self.summary(), 'counters': dict(self.counters)}
+        if episodes:
+            report['episodes'] = self.episodes
+        if path is None:
+            return json.dumps(report, indent=2)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+# An arrow flies from the shooter's cell to the wall it faces. Shooting right
+# or up covers the shooter's cell, as does shooting down; shooting left
+# starts from the next cell. A live wumpus is never in the shooter's cell.
+
+
+def wumpus_index(wumpus):
+    """
+    Per-row and per-column wumpus positions of (N, H, W) wumpus masks:
+    (N, H) column of the wumpus in each row and (N, W) row of the wumpus in
+    each column, -1 where there is none
+    """
+    wumpus = np.asarray(wumpus, dtype=bool)
+    n, height, width = wumpus.shape
+    row_index = np.where(wumpus.any(axis=2), wumpus.argmax(axis=2), -1)
+    col_index = np.where(wumpus.any(axis=1), wumpus.argmax(axis=1), -1)
+    return row_index, col_index
+
+
+def in_line_of_fire(row_index, col_index, row, col, orientation):
+    """
+    Whether an arrow shot from (row, col) in the orientation index hits the
+    wumpus. Takes scalars with the indexes of one world, or (N,) arrays
+    with the (N, H) and (N, W) indexes of wumpus_index.
+    """
+    if np.ndim(row) == 0:
+        wumpus_col = row_index[row]
+        wumpus_row = col_index[col]
+    else:
+        worlds = np.arange(len(row))
+        wumpus_col = row_index[worlds, row]
+        wumpus_row = col_index[worlds, col]
+    return arrow_hits(row, col, orientation, wumpus_col, wumpus_row)
+
+
+def arrow_hits(row, col, orientation, wumpus_col, wumpus_row):
+    """
+    Whether an arrow shot from (row, col) hits the wumpus, wumpus_col being
+    its column if it is in the shooter's row and wumpus_row its row if it
+    is in the shooter's column, -1 otherwise. Elementwise, so it takes
+    scalars or arrays, and step_kernel compiles it with numba.
+    """
+    return ((orientation == 0) & (wumpus_col >= col)) | \
+        ((orientation == 2) & (wumpus_col >= 0) & (wumpus_col < col)) | \
+        ((orientation == 3) & (wumpus_row >= row)) | \
+        ((orientation == 1) & (wumpus_row >= 0) & (wumpus_row <= row))
+
+
+def arrow_cells(loc, orientation, height, width):
+    """
+    Flat indices of the cells an arrow shot from loc in the orientation
+    index flies through, the cells in_line_of_fire checks
+    """
+    row, col = loc
+    if orientation == 0:  # right
+        return row * width + np.arange(col, width)
+    elif orientation == 2:  # left
+        return row * width + np.arange(0, col)
+    elif orientation == 3:  # up
+        return np.arange(row, height) * width + col
+    return np.arange(0, row + 1) * width + col  # down
@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from .environment import Environment, unpack_percepts
+from .episode import Episode, EpisodeResult
+from .trace import TraceReader
+
+
+@dataclass
+class Rerun:
+    result: EpisodeResult
+    actions: list  # actions played, the recorded ones up to the rerun step
+    chosen: list  # actions the agent chose at every step
+    decisions: list  # decision attribute of the agent at every step, if any
+    divergence: int  # first step where the agent's choice is not the recorded action, or None
+
+
+class Replay:
+    """
+    Replays recorded actions on a world. The environment can be moved to
+    any step, from the closest of the snapshots taken every
+    snapshot_interval steps, and agents can be rerun from any step.
+
+        replay = Replay.from_trace('trace.bin', 12)
+        replay.seek(40).print_grid()
+        rerun = replay.rerun('proba_agent', 40, agent_params={'inference': 'loopy_bp'})
+    """
+
+    def __init__(self, layout, actions, pit_proba=None, snapshot_interval=16):
+        """
+        layout is the (height, width) layout of the world, see
+        Environment.from_layout, actions the action characters played on it.
+        Climbing without the gold is allowed, as in Episode.
+        """
+        self.layout = np.asarray(layout, dtype=np.uint8)
+        self.actions = list(actions)
+        self.snapshot_interval = snapshot_interval
+        self.recorded = None  # trace step records, see from_trace
+
+        self.environment = Environment.from_layout(self.layout, True, pit_proba)
+        self.pit_proba = self.environment.pitProb
+
+        # Play the actions once, keeping a snapshot every snapshot_interval
+        # steps and the packed percepts of every step
+        self._snapshots = [self.environment.snapshot()]
+        self.percepts = [self.environment.step_packed()[0]]
+        for step, action in enumerate(self.actions, 1):
+            self.percepts.append(self.environment.step_packed(action)[0])
+            if step % snapshot_interval == 0:
+                self._snapshots.append(self.environment.snapshot())
+        self.step = len(self.actions)
+
+    @classmethod
+    def from_trace(cls, trace, episode, snapshot_interval=16):
+        """
+        Replay of an episode of a trace, a TraceReader or the path of a
+        trace file
+        """
+        if not isinstance(trace, TraceReader):
+            trace = TraceReader(trace)
+        record = trace.episodes[trace.episodes['episode'] == episode]
+        if len(record) == 0:
+            raise ValueError(f"No episode {episode} in {trace.path}")
+        replay = cls(record[0]['layout'], trace.actions(episode), float(record[0]['pit_proba']),
+                     snapshot_interval)
+        replay.recorded = trace.episode_steps(episode)
+        return replay
+
+    def __len__(self):
+        return len(self.actions)
+
+    def seek(self, step):
+        """
+        Move the environment to after step actions, negative steps counting
+        from the end. Returns the environment.
+        """
+        step = self._step_index(step)
+
+        snapshot = min(step // self.snapshot_interval, len(self._snapshots) - 1)
+        self.environment.restore(self._snapshots[snapshot])
+        for action in self.actions[snapshot * self.snapshot_interval:step]:
+            self.environment.step_packed(action)
+        self.step = step
+        return self.environment
+
+    def _step_index(self, step):
+        """
+        step in 0..len(self), negative steps counting from the end
+        """
+        if step < 0:
+            step += len(self.actions) + 1
+        if not 0 <= step <= len(self.actions):
+            raise ValueError(f"Step {step} out of 0..{len(self.actions)}")
+        return step
+
+    def forward(self, steps=1):
+        return self.seek(min(self.step + steps, len(self.actions)))
+
+    def back(self, steps=1):
+        return self.seek(max(self.step - steps, 0))
+
+    def state(self):
+        """
+        What the agent perceived and where it was at the current step
+        """
+        agent_state = self.environment.agent_state
+        return {
+            'step': self.step,
+            'action': self.actions[self.step - 1] if self.step else None,
+            'percepts': unpack_percepts(self.percepts[self.step], agent_state.points()),
+            'location': agent_state.location,
+            'orientation': agent_state.orientation,
+            'arrows': agent_state.arrows,
+            'points': agent_state.points(),
+            'dead': agent_state.is_dead(),
+            'exited': agent_state.exited(),
+            'gold_grabbed': self.environment.gold_grabbed,
+            'wumpus_dead': self.environment.wumpus_dead,
+        }
+
+    def rerun(self, agent_type, step=0, agent_params=None, max_steps=None):
+        """
+        Play the recorded actions up to step with a new agent of agent_type,
+        then let it play on. The agent chooses at every step, and observes
+        the recorded action when it is played instead. Agents only know
+        what they perceived, so the rerun starts from the first step
+        whatever step is, negative steps counting from the end like seek.
+        max_steps bounds the whole episode.
+        """
+        step = self._step_index(step)
+
+        episode = Episode(False, pit_proba=self.pit_proba, layout=self.layout)
+        actions, chosen, decisions = [], [], []
+        result = episode.reset(agent_type, max_steps=max_steps, agent_params=agent_params)
+        try:
+            while result is None:
+                action = self.actions[episode.steps] if episode.steps < step else None
+                result = episode.step(action)
+                chosen.append(str(episode.agent_action))
+                actions.append(action or chosen[-1])
+                decisions.append(getattr(episode.agent, 'decision', None))
+        finally:
+            episode.close()
+
+        divergence = next((i for i, (a, b) in enumerate(zip(chosen, self.actions)) if a != b),
+                          None)
+        if divergence is None and len(chosen) != len(self.actions):
+            divergence = min(len(chosen), len(self.actions))
+        return Rerun(result, actions, chosen, decisions, divergence)
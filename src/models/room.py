@@ -1,17 +1,48 @@
+# Bit flags of a cell in Environment.cells
+PIT = 1
+WUMPUS = 2
+GLITTER = 4
+BREEZE = 8
+STENCH = 16
+VISITED = 32
+
+
 class Room:
-    has_stench = False
-    has_breeze = False
-    has_glitter = False
-    has_wumpus = False
-    has_pit = False
-    visited = False
-
-    def __init__(self, has_stench=False, has_breeze=False, has_glitter=False, has_wumpus=False, has_pit=False):
-        self.has_stench = has_stench
-        self.has_breeze = has_breeze
-        self.has_glitter = has_glitter
-        self.has_wumpus = has_wumpus
-        self.has_pit = has_pit
+    """
+    Read-only view of one cell of a bit-packed grid
+    """
+    __slots__ = ('_cells', '_location')
+
+    def __init__(self, cells, location):
+        self._cells = cells
+        self._location = location
+
+    def _has(self, flag):
+        return bool(self._cells.item(self._location) & flag)
+
+    @property
+    def has_stench(self):
+        return self._has(STENCH)
+
+    @property
+    def has_breeze(self):
+        return self._has(BREEZE)
+
+    @property
+    def has_glitter(self):
+        return self._has(GLITTER)
+
+    @property
+    def has_wumpus(self):
+        return self._has(WUMPUS)
+
+    @property
+    def has_pit(self):
+        return self._has(PIT)
+
+    @property
+    def visited(self):
+        return self._has(VISITED)
 
     def __str__(self):
         return str((self.has_stench, self.has_breeze, self.has_glitter, self.has_wumpus, self.has_pit))
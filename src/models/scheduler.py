@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def play_episodes(episodes, agent_type='naive', max_workers=None, **play_options):
+    """
+    Play the episodes on a pool of threads, each episode with its own agent.
+    play_options are passed to Episode.play. Returns the results in the
+    order of episodes.
+    """
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = [executor.submit(episode.play, agent_type, **play_options)
+                   for episode in episodes]
+        return [future.result() for future in futures]
+
+
+def interleave_episodes(episodes, agent_type='naive', **reset_options):
+    """
+    Play the episodes in the calling thread, one step of each in turn, so
+    they are all in progress at once. reset_options are passed to
+    Episode.reset. Returns the results in the order of episodes.
+    """
+    results = [episode.reset(agent_type, **reset_options) for episode in episodes]
+    active = [i for i, result in enumerate(results) if result is None]
+    try:
+        while active:
+            still_active = []
+            for i in active:
+                results[i] = episodes[i].step()
+                if results[i] is None:
+                    still_active.append(i)
+                else:
+                    episodes[i].close()
+            active = still_active
+    finally:
+        for episode in episodes:
+            episode.close()
+    return results
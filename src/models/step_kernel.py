@@ -0,0 +1,218 @@
+import numpy as np
+
+from .batch_environment import NOOP, FORWARD, TURN_LEFT, TURN_RIGHT, GRAB, CLIMB, SHOOT, \
+    ROW_DELTA, COL_DELTA
+from .environment import STENCH_BIT, BREEZE_BIT, GLITTER_BIT, BUMP_BIT, SCREAM_BIT
+from .line_of_fire import arrow_hits
+from .room import PIT, WUMPUS, GLITTER, BREEZE, STENCH, VISITED
+from .world_generator import layouts_to_cells
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _cell_percepts(cell):
+    """
+    Packed stench, breeze and glitter percepts of cells flags
+    """
+    return ((cell & STENCH) > 0) * STENCH_BIT | ((cell & BREEZE) > 0) * BREEZE_BIT | \
+        ((cell & GLITTER) > 0) * GLITTER_BIT
+
+
+def _make_step_loop(arrow_hits, cell_percepts):
+    """
+    Loop stepping the worlds one at a time with the given helpers, the
+    Python ones or their numba versions
+    """
+    def step_loop(actions, cells, height, width, wumpus_cell, row, col, orientation, arrows,
+                  points, dead, exited, wumpus_dead, gold_grabbed, allow_climb_without_gold,
+                  percepts, rewards):
+        for i in range(actions.shape[0]):
+            action = actions[i]
+            r = row[i]
+            c = col[i]
+            active = not (dead[i] or exited[i])
+            reward = 0
+            bump = 0
+
+            if active and action != NOOP:
+                reward = -1
+                o = orientation[i]
+                if action == FORWARD:
+                    next_r = r + ROW_DELTA[o]
+                    next_c = c + COL_DELTA[o]
+                    if 0 <= next_r < height and 0 <= next_c < width:
+                        r = next_r
+                        c = next_c
+                        row[i] = r
+                        col[i] = c
+                        cell = cells[i, r * width + c]
+                        cells[i, r * width + c] = cell | VISITED
+                        if cell & PIT:
+                            reward -= 1000
+                            dead[i] = True
+                        if cell & WUMPUS and not wumpus_dead[i]:
+                            reward -= 1000
+                            dead[i] = True
+                    else:
+                        bump = BUMP_BIT
+                elif action == TURN_LEFT:
+                    orientation[i] = (o + 3) % 4
+                elif action == TURN_RIGHT:
+                    orientation[i] = (o + 1) % 4
+                elif action == SHOOT:
+                    reward = -10
+                    if arrows[i] > 0:
+                        arrows[i] -= 1
+                        wumpus_row, wumpus_col = divmod(wumpus_cell[i], width)
+                        if arrow_hits(r, c, o, wumpus_col if wumpus_row == r else -1,
+                                      wumpus_row if wumpus_col == c else -1):
+                            wumpus_dead[i] = True
+
+            # Glitter is perceived before the gold is taken
+            cell = cells[i, r * width + c]
+            percept = cell_percepts(cell) | bump
+            if wumpus_dead[i]:
+                percept |= SCREAM_BIT
+
+            if active and action == GRAB:
+                if cell & GLITTER and not gold_grabbed[i]:
+                    gold_grabbed[i] = True
+                    cells[i, r * width + c] = cell ^ GLITTER
+            elif active and action == CLIMB and r == 0 and c == 0:
+                if gold_grabbed[i]:
+                    reward += 1000
+                    exited[i] = True
+                elif allow_climb_without_gold:
+                    exited[i] = True
+
+            points[i] += reward
+            percepts[i] = percept
+            rewards[i] = reward
+
+    return step_loop
+
+
+_step_loop = _make_step_loop(arrow_hits, _cell_percepts)
+
+
+def _step_numpy(actions, cells, height, width, wumpus_cell, row, col, orientation, arrows,
+                points, dead, exited, wumpus_dead, gold_grabbed, allow_climb_without_gold,
+                percepts, rewards):
+    """
+    Same as _step_loop with array operations over all worlds
+    """
+    idx = np.arange(len(actions))
+    active = ~(dead | exited)
+    acting = active & (actions != NOOP)
+    reward = np.where(acting, -1, 0)
+
+    forward = acting & (actions == FORWARD)
+    next_row = row + ROW_DELTA[orientation]
+    next_col = col + COL_DELTA[orientation]
+    inside = (next_row >= 0) & (next_row < height) & (next_col >= 0) & (next_col < width)
+    bump = forward & ~inside
+    moved = forward & inside
+    row[moved] = next_row[moved]
+    col[moved] = next_col[moved]
+    flat = row * width + col
+    cells[idx[moved], flat[moved]] |= VISITED
+
+    cell = cells[idx, flat]
+    fell = moved & (cell & PIT > 0)
+    eaten = moved & (cell & WUMPUS > 0) & ~wumpus_dead
+    reward -= 1000 * fell + 1000 * eaten
+    dead |= fell | eaten
+
+    turn_left = acting & (actions == TURN_LEFT)
+    turn_right = acting & (actions == TURN_RIGHT)
+    orientation[turn_left] = (orientation[turn_left] + 3) % 4
+    orientation[turn_right] = (orientation[turn_right] + 1) % 4
+
+    shoot = acting & (actions == SHOOT)
+    reward[shoot] = -10
+    shooting = shoot & (arrows > 0)
+    arrows[shooting] -= 1
+    wumpus_row, wumpus_col = np.divmod(wumpus_cell, width)
+    wumpus_dead |= shooting & arrow_hits(row, col, orientation,
+                                         np.where(wumpus_row == row, wumpus_col, -1),
+                                         np.where(wumpus_col == col, wumpus_row, -1))
+
+    percepts[:] = _cell_percepts(cell) | bump * BUMP_BIT | wumpus_dead * SCREAM_BIT
+
+    grab = active & (actions == GRAB) & (cell & GLITTER > 0) & ~gold_grabbed
+    gold_grabbed |= grab
+    cells[idx[grab], flat[grab]] &= ~np.uint8(GLITTER)
+
+    at_start = active & (actions == CLIMB) & (row == 0) & (col == 0)
+    reward += 1000 * (at_start & gold_grabbed)
+    exited |= at_start & (gold_grabbed | allow_climb_without_gold)
+
+    points += reward
+    rewards[:] = reward
+
+
+if numba is not None:
+    # Separate names so _step_numpy keeps the Python helpers
+    _arrow_hits_nb = numba.njit(arrow_hits)
+    _cell_percepts_nb = numba.njit(_cell_percepts)
+    step_worlds = numba.njit(_make_step_loop(_arrow_hits_nb, _cell_percepts_nb))
+else:
+    step_worlds = _step_numpy
+
+
+class KernelEnvironment:
+    """
+    N worlds as flat arrays stepped by step_worlds: the numba kernel if
+    numba is installed, array operations otherwise. Rules are those of
+    Environment.get_percepts, actions are batch_environment action codes.
+    """
+
+    def __init__(self, layouts, allow_climb_without_gold=False, step=None):
+        """
+        layouts is a (N, height, width) array of PIT, WUMPUS and GLITTER
+        flags, see world_generator.draw_layouts. step overrides the kernel.
+        """
+        layouts = np.asarray(layouts, dtype=np.uint8)
+        n, self.height, self.width = layouts.shape
+        self.n_worlds = n
+        self.allow_climb_without_gold = allow_climb_without_gold
+        self._step = step or step_worlds
+
+        self.cells = layouts_to_cells(layouts).reshape(n, -1)
+        self.wumpus_cell = np.argmax(self.cells & WUMPUS > 0, axis=1)
+
+        self.row = np.zeros(n, dtype=np.int64)
+        self.col = np.zeros(n, dtype=np.int64)
+        self.orientation = np.zeros(n, dtype=np.int64)
+        self.arrows = np.ones(n, dtype=np.int64)
+        self.points = np.zeros(n, dtype=np.int64)
+        self.dead = np.zeros(n, dtype=bool)
+        self.exited = np.zeros(n, dtype=bool)
+        self.wumpus_dead = np.zeros(n, dtype=bool)
+        self.gold_grabbed = np.zeros(n, dtype=bool)
+
+        self.percepts = np.zeros(n, dtype=np.int64)
+        self.rewards = np.zeros(n, dtype=np.int64)
+
+    def done(self):
+        return self.dead | self.exited
+
+    def step(self, actions):
+        """
+        Apply one action code per world. Returns (percepts, rewards),
+        percepts packed as environment.*_BIT. Both arrays are reused by the
+        next step.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.n_worlds,):
+            raise ValueError(
+                f"Expected actions of shape ({self.n_worlds},), got {actions.shape}")
+
+        self._step(actions, self.cells, self.height, self.width, self.wumpus_cell,
+                   self.row, self.col, self.orientation, self.arrows, self.points,
+                   self.dead, self.exited, self.wumpus_dead, self.gold_grabbed,
+                   self.allow_climb_without_gold, self.percepts, self.rewards)
+        return self.percepts, self.rewards
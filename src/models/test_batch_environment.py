@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+from .batch_environment import BatchEnvironment, encode_actions, neighbours, \
+    FORWARD, TURN_LEFT, GRAB, CLIMB, SHOOT, NOOP
+
+
+class TestBatchEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.environment = BatchEnvironment(64, width=5, height=4, seed=7)
+
+    def test_layout(self):
+        env = self.environment
+        self.assertEqual(env.pits.shape, (64, 4, 5))
+        self.assertTrue((env.pits.sum(axis=(1, 2)) == env.pit_count()).all())
+        self.assertTrue((env.wumpus.sum(axis=(1, 2)) == 1).all())
+        self.assertTrue((env.gold.sum(axis=(1, 2)) == 1).all())
+        self.assertFalse((env.pits & env.wumpus).any())
+        self.assertFalse((env.gold & (env.pits | env.wumpus)).any())
+        self.assertFalse(env.pits[:, 0, 0].any() | env.wumpus[:, 0, 0].any())
+        self.assertTrue((env.breeze == neighbours(env.pits)).all())
+        self.assertTrue((env.stench == neighbours(env.wumpus)).all())
+
+    def test_encode_actions(self):
+        codes = encode_actions(['f', 'l', None, 's'])
+        self.assertEqual(codes.tolist(), [FORWARD, TURN_LEFT, NOOP, SHOOT])
+
+    def test_bump(self):
+        env = self.environment
+        env.step(np.full(64, TURN_LEFT))  # facing up
+        env.step(np.full(64, TURN_LEFT))  # facing left
+        percepts, rewards = env.step(np.full(64, FORWARD))
+        self.assertTrue(percepts["bump"].all())
+        self.assertTrue((rewards == -1).all())
+        self.assertTrue((env.points == -3).all())
+
+    def test_forward_into_hazard(self):
+        env = self.environment
+        _, rewards = env.step(np.full(64, FORWARD))
+        hazard = env.pits[:, 0, 1] | env.wumpus[:, 0, 1]
+        self.assertTrue((env.dead == hazard).all())
+        self.assertTrue((rewards[hazard] == -1001).all())
+
+        # Finished worlds are not stepped anymore
+        _, rewards = env.step(np.full(64, TURN_LEFT))
+        self.assertTrue((rewards[hazard] == 0).all())
+
+    def test_climb(self):
+        env = self.environment
+        env.gold[:, 0, 0] = True
+        env.step(np.full(64, GRAB))
+        self.assertTrue(env.gold_grabbed.all())
+        _, rewards = env.step(np.full(64, CLIMB))
+        self.assertTrue(env.exited.all())
+        self.assertTrue((rewards == 999).all())
+
+    def test_shoot(self):
+        env = self.environment
+        env.step(np.full(64, SHOOT))
+        in_line = env.wumpus[:, 0, :].any(axis=1)
+        self.assertTrue((env.wumpus_dead == in_line).all())
+        self.assertTrue((env.arrows == 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 
-from .environment import Environment
+import numpy as np
+
+from .environment import (Environment, PERCEPTS, STENCH_BIT, BREEZE_BIT, GLITTER_BIT,
+                          BUMP_BIT, SCREAM_BIT, unpack_percepts)
+from .room import PIT, WUMPUS, GLITTER
 
 
 class TestSquareEnvironment(unittest.TestCase):
@@ -10,6 +14,16 @@ class TestSquareEnvironment(unittest.TestCase):
     def test_print_grid(self):
         self.environment.print_grid()
 
+    def test_room_view(self):
+        self.assertEqual(self.environment.cells.dtype, np.uint8)
+        room = self.environment.grid.item((0, 0))
+        self.assertTrue(room.visited)
+        self.assertFalse(room.has_pit)
+        self.assertFalse(room.has_wumpus)
+
+        pits = sum(r.has_pit for r in self.environment.grid.flat)
+        self.assertEqual(pits, self.environment.pit_count())
+
     def test_right_idx(self):
         i = self.environment.right_idx(4)
         self.assertEqual(i, -1)
@@ -62,6 +76,89 @@ class TestSquareEnvironment(unittest.TestCase):
         i = self.environment.bottom_idx(19)
         self.assertEqual(i, 14)
 
+    def test_reset(self):
+        cells = self.environment.cells
+        agent_state = self.environment.agent_state
+        self.environment.step('l')
+
+        observation, info = self.environment.reset(seed=4)
+        self.assertIs(self.environment.cells, cells)
+        self.assertIs(self.environment.agent_state, agent_state)
+        self.assertEqual(observation.shape, (len(PERCEPTS),))
+        self.assertEqual(info["points"], 0)
+        self.assertEqual(info["orientation"], 0)
+
+        layout = cells.copy()
+        self.environment.reset(seed=4)
+        self.assertTrue(np.array_equal(cells, layout))
+
+    def test_step(self):
+        self.environment.reset(seed=5, max_steps=3)
+        observation, reward, terminated, truncated, info = self.environment.step('r')
+        self.assertEqual(reward, -1)
+        self.assertEqual(info["orientation"], 1)
+        self.assertFalse(terminated or truncated)
+
+        # Facing down from (0, 0) bumps into the wall
+        observation, reward, terminated, truncated, info = self.environment.step('f')
+        self.assertTrue(observation[PERCEPTS.index('bump')])
+        self.assertEqual(info["location"], (0, 0))
+
+        _, _, terminated, truncated, _ = self.environment.step('l')
+        self.assertFalse(terminated)
+        self.assertTrue(truncated)
+
+
+class TestLayoutEnvironment(unittest.TestCase):
+    def setUp(self):
+        layout = np.zeros((4, 4), dtype=np.uint8)
+        layout[0, 1] = GLITTER
+        layout[0, 2] = WUMPUS
+        layout[2, 0] = PIT
+        self.environment = Environment.from_layout(layout)
+
+    def test_step_packed(self):
+        percepts, points = self.environment.step_packed()
+        self.assertEqual((percepts, points), (0, 0))
+
+        percepts, points = self.environment.step_packed('f')
+        self.assertEqual(percepts, STENCH_BIT | GLITTER_BIT)
+        self.assertEqual(points, -1)
+
+        # Glitter is perceived while grabbing, not after
+        percepts, _ = self.environment.step_packed('g')
+        self.assertTrue(percepts & GLITTER_BIT)
+        percepts, _ = self.environment.step_packed('g')
+        self.assertFalse(percepts & GLITTER_BIT)
+
+        percepts, points = self.environment.step_packed('s')
+        self.assertEqual(percepts, STENCH_BIT | SCREAM_BIT)
+        self.assertEqual(points, -10)
+
+        self.environment.step_packed('l')
+        percepts, _ = self.environment.step_packed('l')
+        self.assertEqual(self.environment.agent_state.orientation, 2)
+        self.environment.step_packed('f')
+        self.environment.step_packed('r')
+        percepts, _ = self.environment.step_packed('f')
+        self.assertEqual(percepts, BREEZE_BIT | SCREAM_BIT)
+
+        self.environment.step_packed('l')
+        self.environment.step_packed('l')
+        self.environment.step_packed('f')
+        percepts, _ = self.environment.step_packed('f')
+        self.assertEqual(percepts & BUMP_BIT, BUMP_BIT)
+
+    def test_get_percepts(self):
+        self.assertEqual(self.environment.get_percepts('f'), unpack_percepts(STENCH_BIT | GLITTER_BIT, -1))
+
+    def test_climb_with_gold(self):
+        for action in 'fgllfc':
+            self.environment.get_percepts(action)
+        self.assertTrue(self.environment.agent_state.exited())
+        # Five actions at -1 and the climb out with the gold
+        self.assertEqual(self.environment.agent_state.points(), -5 + 999)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+
+from .evaluation import SequentialEvaluation, mean_interval, wilson_interval, episodes_for_width
+
+
+def results(scores, won=None, died=None):
+    n = len(scores)
+    won = np.zeros(n, dtype=bool) if won is None else won
+    died = np.zeros(n, dtype=bool) if died is None else died
+    return [{'score': s, 'won': w, 'died': d} for s, w, d in zip(scores, won, died)]
+
+
+class TestIntervals(unittest.TestCase):
+    def test_mean_interval(self):
+        mean, low, high = mean_interval([1, 2, 3, 4, 5])
+        self.assertEqual(mean, 3)
+        self.assertAlmostEqual(high - mean, 1.959964 * np.sqrt(2.5 / 5), places=5)
+
+    def test_wilson_interval(self):
+        self.assertAlmostEqual(wilson_interval(0, 10)[1], 0.0)
+        self.assertAlmostEqual(wilson_interval(0, 10)[2], 0.2775, places=4)
+        _, low, high = wilson_interval(5, 10)
+        self.assertAlmostEqual(low, 0.2366, places=4)
+        self.assertAlmostEqual(high, 0.7634, places=4)
+
+    def test_episodes_for_width(self):
+        n = episodes_for_width(100, 10)
+        values = np.random.default_rng(0).normal(0, 100, n)
+        _, low, high = mean_interval(values)
+        self.assertAlmostEqual(high - low, 10, delta=0.5)
+
+
+class TestSequentialEvaluation(unittest.TestCase):
+    def run_evaluation(self, evaluation, draw):
+        rng = np.random.default_rng(1)
+        reason = None
+        while reason is None:
+            n = evaluation.next_batch()
+            # Common random numbers: the world adds the same to every agent
+            worlds = rng.normal(0, 500, n)
+            for agent in evaluation.agents:
+                evaluation.add(agent, results(worlds + draw(agent, rng, n)))
+            reason = evaluation.stop_reason()
+        return reason
+
+    def test_separated(self):
+        evaluation = SequentialEvaluation(['a', 'b'], score_width=1, min_batch=100)
+        reason = self.run_evaluation(evaluation, lambda agent, rng, n: (
+            rng.normal(0, 20, n) + (10 if agent == 'a' else 0)))
+        self.assertEqual(reason, 'separated')
+        # Paired differences are far narrower than the score intervals
+        _, low, high = evaluation.difference('a', 'b')
+        score = evaluation.intervals('a')['score']
+        self.assertLess(high - low, (score[2] - score[1]) / 5)
+        self.assertGreater(low, 0)
+
+    def test_precise(self):
+        evaluation = SequentialEvaluation(['a', 'b'], score_width=50, rate_width=0.1,
+                                          min_batch=100)
+        reason = self.run_evaluation(evaluation, lambda agent, rng, n: np.zeros(n))
+        self.assertEqual(reason, 'precise')
+        for agent in evaluation.agents:
+            _, low, high = evaluation.intervals(agent)['score']
+            self.assertLessEqual(high - low, 50)
+
+    def test_max_episodes(self):
+        evaluation = SequentialEvaluation(['a', 'b'], score_width=1, max_episodes=1000,
+                                          min_batch=100)
+        batches = []
+        original = evaluation.next_batch
+
+        def next_batch():
+            batches.append(original())
+            return batches[-1]
+        evaluation.next_batch = next_batch
+
+        reason = self.run_evaluation(evaluation, lambda agent, rng, n: np.zeros(n))
+        self.assertEqual(reason, 'max_episodes')
+        self.assertEqual(evaluation.episodes(), 1000)
+        # Batches at most double what was played
+        self.assertEqual(batches, [100, 100, 200, 400, 200])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import unittest
+
+import numpy as np
+
+from .agent.inference import ExactInference
+from .environment import Environment
+from .episode import Episode
+from .instrumentation import Instrumentation
+
+
+class TestInstrumentation(unittest.TestCase):
+    def test_enable_disable(self):
+        original = Environment.__dict__['get_percepts']
+        instrumentation = Instrumentation([('.environment', 'Environment', 'get_percepts')])
+        with instrumentation:
+            self.assertIsNot(Environment.__dict__['get_percepts'], original)
+            Environment(seed=0).get_percepts('l')
+        self.assertIs(Environment.__dict__['get_percepts'], original)
+
+        # Nothing is timed once disabled
+        Environment(seed=0).get_percepts('l')
+        self.assertEqual(len(instrumentation.durations['Environment.get_percepts']), 1)
+
+    def test_single_instance(self):
+        with Instrumentation([]):
+            with self.assertRaises(RuntimeError):
+                Instrumentation([]).enable()
+        # Enabled again once the first one is disabled
+        with Instrumentation([]):
+            pass
+
+    def test_episode(self):
+        with Instrumentation() as instrumentation:
+            result = Episode(False, seed=1).play('proba_agent')
+            instrumentation.end_episode(steps=result.steps)
+
+        summary = instrumentation.summary()
+        self.assertEqual(summary['Episode.step']['count'], result.steps)
+        self.assertEqual(summary['ProbaAgent.next_step']['count'], result.steps)
+        self.assertLessEqual(summary['Episode.step']['p50_seconds'],
+                             summary['Episode.step']['p99_seconds'])
+
+        episode, = instrumentation.episodes
+        self.assertEqual(episode['steps'], result.steps)
+        self.assertEqual(episode['timings']['Episode.step']['count'], result.steps)
+        self.assertIn('timings', json.loads(instrumentation.to_json()))
+
+        counters = instrumentation.counters
+        self.assertGreater(counters['marginals_computed'], 0)
+        # Memoized beliefs and components spare computations
+        self.assertLessEqual(counters['marginals_computed'], counters['marginals_lookups'])
+        self.assertLessEqual(counters['components_computed'], counters['component_lookups'])
+        self.assertEqual(json.loads(instrumentation.to_json())['counters'], dict(counters))
+
+    def test_split_component_counted_once(self):
+        # The 6 cell component is enumerated in chunks, the 2 cell one whole
+        observations = np.full(72, -1)
+        observations[[0, 2, 4, 30]] = 0
+        observations[[36, 38, 40, 66]] = 1
+        with Instrumentation([]) as instrumentation:
+            ExactInference(6, 6, .2, max_frontier=4).marginals(observations)
+        self.assertEqual(instrumentation.counters['component_lookups'], 2)
+        self.assertEqual(instrumentation.counters['components_computed'], 2)
+
+    def test_merge(self):
+        instrumentation = Instrumentation()
+        instrumentation.merge({'a': [1.0, 2.0]}, {'calls': 2}, [{'steps': 1}])
+        instrumentation.merge({'a': [3.0]}, {'calls': 1})
+        self.assertEqual(instrumentation.summary()['a']['count'], 3)
+        self.assertEqual(instrumentation.summary()['a']['p50_seconds'], 2.0)
+        self.assertEqual(instrumentation.counters['calls'], 3)
+        self.assertEqual(len(instrumentation.episodes), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
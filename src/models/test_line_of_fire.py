@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from .environment import Environment
+from .line_of_fire import arrow_cells, in_line_of_fire, wumpus_index
+from .room import WUMPUS
+
+
+class TestLineOfFire(unittest.TestCase):
+    def test_wumpus_index(self):
+        wumpus = np.zeros((2, 3, 4), dtype=bool)
+        wumpus[0, 1, 2] = True
+        wumpus[1, 2, 0] = True
+        row_index, col_index = wumpus_index(wumpus)
+        self.assertEqual(row_index.tolist(), [[-1, 2, -1], [-1, -1, 0]])
+        self.assertEqual(col_index.tolist(), [[-1, -1, 1, -1], [2, -1, -1, -1]])
+
+    def test_matches_arrow_cells(self):
+        height, width = 3, 4
+        for wumpus_cell in range(height * width):
+            wumpus = np.zeros((1, height, width), dtype=bool)
+            wumpus.flat[wumpus_cell] = True
+            row_index, col_index = wumpus_index(wumpus)
+            for row in range(height):
+                for col in range(width):
+                    for orientation in range(4):
+                        path = arrow_cells((row, col), orientation, height, width)
+                        hit = in_line_of_fire(row_index[0], col_index[0], row, col, orientation)
+                        self.assertEqual(bool(hit), wumpus_cell in path)
+
+    def test_vectorized(self):
+        rng = np.random.default_rng(0)
+        wumpus = np.zeros((200, 4, 5), dtype=bool)
+        wumpus.reshape(200, -1)[np.arange(200), rng.integers(20, size=200)] = True
+        row_index, col_index = wumpus_index(wumpus)
+        row, col = rng.integers(4, size=200), rng.integers(5, size=200)
+        orientation = rng.integers(4, size=200)
+
+        hits = in_line_of_fire(row_index, col_index, row, col, orientation)
+        expected = [in_line_of_fire(row_index[i], col_index[i], row[i], col[i], orientation[i])
+                    for i in range(200)]
+        self.assertEqual(hits.tolist(), [bool(h) for h in expected])
+
+    def test_shoot_down(self):
+        layout = np.zeros((4, 4), dtype=np.uint8)
+        layout[0, 3] = WUMPUS
+        layout[3, 3] = 4  # gold
+        environment = Environment.from_layout(layout)
+        agent_state = environment.agent_state
+        agent_state.set_location((2, 3))
+        agent_state.orientation = 1  # down
+        self.assertTrue(environment._shoot_wumpus((2, 3), 'down'))
+
+        # The wumpus above is out of the line of fire
+        layout[0, 3], layout[3, 0] = 0, WUMPUS
+        environment = Environment.from_layout(layout)
+        self.assertFalse(environment._shoot_wumpus((2, 0), 'down'))
+
+
+if __name__ == '__main__':
+    unittest.main()
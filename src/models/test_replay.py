@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .episode import Episode
+from .environment import pack_percepts
+from .replay import Replay
+from .trace import TraceWriter, TraceRecorder, TraceReader
+
+
+class TestReplay(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        path = os.path.join(cls.dir.name, 'trace.bin')
+        with TraceWriter(path, 6, 6) as writer:
+            recorder = TraceRecorder(writer)
+            cls.results = {agent: [Episode(False, 6, seed=seed).play(agent, recorder)
+                                   for seed in range(10)]
+                           for agent in ('proba_agent', 'naive')}
+            recorder.flush()
+        cls.trace = TraceReader(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dir.cleanup()
+
+    def longest(self, agent):
+        results = self.results[agent]
+        i = max(range(len(results)), key=lambda i: results[i].steps)
+        return (i if agent == 'proba_agent' else len(results) + i), results[i]
+
+    def test_seek(self):
+        episode, result = self.longest('proba_agent')
+        replay = Replay.from_trace(self.trace, episode, snapshot_interval=4)
+        self.assertEqual(len(replay), result.steps)
+
+        # Out of order, back and forth across snapshots
+        for step in np.random.default_rng(0).permutation(len(replay) + 1):
+            replay.seek(step)
+            state = replay.state()
+            record = replay.recorded[step]
+            self.assertEqual(state['location'], (record['row'], record['col']))
+            self.assertEqual(state['orientation'], record['orientation'])
+            self.assertEqual(state['points'], record['points'])
+            self.assertEqual(pack_percepts(state['percepts']), record['percepts'])
+
+        replay.seek(-1)
+        self.assertEqual(replay.state()['points'], result.score)
+        self.assertEqual(replay.back(2).agent_state.points(), replay.recorded[-3]['points'])
+
+    def test_rerun_same_agent(self):
+        episode, result = self.longest('proba_agent')
+        replay = Replay.from_trace(self.trace, episode)
+        for step in (0, len(replay) // 2, len(replay), -2):
+            rerun = replay.rerun('proba_agent', step)
+            self.assertEqual(rerun.result, result)
+            self.assertIsNone(rerun.divergence)
+            self.assertEqual(rerun.actions, replay.actions)
+
+    def test_rerun_other_agent(self):
+        episode, result = self.longest('naive')
+        replay = Replay.from_trace(self.trace, episode)
+        step = len(replay) - 1
+        rerun = replay.rerun('proba_agent', step, max_steps=200)
+        self.assertEqual(rerun.actions[:step], replay.actions[:step])
+        self.assertEqual(len(rerun.chosen), rerun.result.steps)
+        self.assertIsNotNone(rerun.divergence)
+        self.assertLessEqual(rerun.divergence, step)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import copy
+import unittest
+
+import numpy as np
+
+from .episode import Episode
+from .scheduler import play_episodes, interleave_episodes
+
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.episodes = [Episode(False, seed=i) for i in range(200)]
+        self.sequential = copy.deepcopy(self.episodes)
+        self.expected = [episode.play('proba_agent', max_steps=200)
+                         for episode in self.sequential]
+
+    def assertIsolated(self, episodes, results):
+        self.assertEqual(results, self.expected)
+        for episode, sequential in zip(episodes, self.sequential):
+            self.assertTrue(np.array_equal(episode.environment.cells,
+                                           sequential.environment.cells))
+            self.assertEqual(episode.agent_state.location, sequential.agent_state.location)
+
+    def test_play_episodes(self):
+        results = play_episodes(self.episodes, 'proba_agent', max_workers=16, max_steps=200)
+        self.assertIsolated(self.episodes, results)
+
+    def test_interleave_episodes(self):
+        results = interleave_episodes(self.episodes, 'proba_agent', max_steps=200)
+        self.assertIsolated(self.episodes, results)
+
+    def test_approximate_backends(self):
+        # Models are shared by the agents of every thread
+        for inference, options in (('loopy_bp', {}),
+                                   ('gibbs', {'n_chains': 32, 'n_sweeps': 20, 'burn_in': 5})):
+            with self.subTest(inference=inference):
+                params = {'inference': inference, 'inference_options': options}
+                episodes = [Episode(False, seed=i) for i in range(100)]
+                sequential = copy.deepcopy(episodes)
+                expected = [episode.play('proba_agent', max_steps=100, agent_params=params)
+                            for episode in sequential]
+                threaded = copy.deepcopy(episodes)
+                self.assertEqual(play_episodes(threaded, 'proba_agent', max_workers=16,
+                                               max_steps=100, agent_params=params), expected)
+                self.assertEqual(interleave_episodes(episodes, 'proba_agent', max_steps=100,
+                                                     agent_params=params), expected)
+
+    def test_agent_reset(self):
+        episode = copy.deepcopy(self.sequential[0])
+        episode.reset('proba_agent')
+        agent = episode.agent
+        while episode.step() is None:
+            pass
+        # Play the same world again with the same agent
+        replay = copy.deepcopy(self.episodes[0])
+        replay.reset('proba_agent')
+        agent.reset(replay.agent_state)
+        replay.agent = agent
+        while replay.step() is None:
+            pass
+        self.assertEqual(replay.result, self.expected[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
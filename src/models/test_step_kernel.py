@@ -0,0 +1,88 @@
+import importlib
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from .batch_environment import ACTIONS, NOOP
+from .environment import Environment
+from . import step_kernel
+from .step_kernel import KernelEnvironment, numba, step_worlds, _step_loop, _step_numpy
+from .world_generator import draw_layouts
+
+
+class StepKernelParity:
+    """
+    Random action traces played by the kernel and by Environment on the
+    same worlds must give the same percepts, rewards and final state
+    """
+    step = None
+
+    def test_parity(self):
+        rng = np.random.default_rng(0)
+        n, steps = 500, 60
+        layouts = draw_layouts(rng, n, 4, 5, 0.2)
+        environments = [Environment.from_layout(layout, allowClimbWithoutGold=True)
+                        for layout in layouts]
+        kernel = KernelEnvironment(layouts, allow_climb_without_gold=True, step=self.step)
+
+        # Few climbs so episodes last, noops included
+        codes = np.append(np.arange(len(ACTIONS)), NOOP)
+        weights = np.array([4, 2, 2, 1, 0.2, 1, 0.5])
+        traces = rng.choice(codes, (steps, n), p=weights / weights.sum())
+
+        for actions in traces:
+            done = kernel.done().copy()
+            percepts, rewards = kernel.step(actions)
+            for i, environment in enumerate(environments):
+                if done[i]:
+                    self.assertEqual(rewards[i], 0)
+                    continue
+                action = ACTIONS[actions[i]] if actions[i] != NOOP else None
+                expected, points = environment.step_packed(action)
+                self.assertEqual((percepts[i], rewards[i]), (expected, points))
+
+        for i, environment in enumerate(environments):
+            state = environment.agent_state
+            self.assertEqual((kernel.row[i], kernel.col[i]), state.location)
+            self.assertEqual(kernel.orientation[i], state.orientation)
+            self.assertEqual(kernel.points[i], state.points())
+            self.assertEqual(kernel.dead[i], state.is_dead())
+            self.assertEqual(kernel.exited[i], state.exited())
+            self.assertEqual(kernel.arrows[i], state.arrows)
+            self.assertTrue(np.array_equal(kernel.cells[i], environment.cells.ravel()))
+
+
+class TestNumpyStep(StepKernelParity, unittest.TestCase):
+    step = staticmethod(_step_numpy)
+
+
+class TestPythonLoopStep(StepKernelParity, unittest.TestCase):
+    step = staticmethod(_step_loop)
+
+
+@unittest.skipIf(numba is None, "numba is not installed")
+class TestNumbaStep(StepKernelParity, unittest.TestCase):
+    step = staticmethod(step_worlds)
+
+
+class TestWithoutNumba(StepKernelParity, unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A fresh import of the module as if numba was not installed
+        with mock.patch.dict(sys.modules, {'numba': None}):
+            del sys.modules[step_kernel.__name__]
+            cls.fallback = importlib.import_module(step_kernel.__name__)
+        cls.step = staticmethod(cls.fallback.step_worlds)
+
+    def test_fallback(self):
+        self.assertIsNone(self.fallback.numba)
+        self.assertIs(self.fallback.step_worlds, self.fallback._step_numpy)
+        # With numba, _step_numpy still calls the Python helpers
+        self.assertFalse(hasattr(step_kernel.arrow_hits, 'py_func'))
+        self.assertFalse(hasattr(step_kernel._cell_percepts, 'py_func'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .environment import Environment, pack_percepts
+from .episode import Episode
+from .trace import TraceWriter, TraceRecorder, TraceReader, DECISIONS, OUTCOMES
+from .world_corpus import LAYOUT_FLAGS
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'trace.bin')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def record(self, seeds, agent='proba_agent', append=False, chunk_size=64):
+        with TraceWriter(self.path, 4, 4, append=append) as writer:
+            recorder = TraceRecorder(writer, chunk_size=chunk_size)
+            results = [Episode(False, seed=seed).play(agent, recorder) for seed in seeds]
+            recorder.flush()
+        return results
+
+    def test_round_trip(self):
+        results = self.record(range(20))
+        trace = TraceReader(self.path)
+
+        self.assertEqual(len(trace), 20)
+        np.testing.assert_array_equal(trace.episodes['episode'], np.arange(20))
+        for i, result in enumerate(results):
+            episode = trace.episodes[i]
+            self.assertEqual(episode['agent'], b'proba_agent')
+            self.assertEqual(episode['score'], result.score)
+            self.assertEqual(OUTCOMES[episode['outcome']], result.outcome)
+            np.testing.assert_array_equal(
+                episode['layout'], Episode(False, seed=i).environment.cells & LAYOUT_FLAGS)
+
+            steps = trace.episode_steps(i)
+            np.testing.assert_array_equal(steps['step'], np.arange(result.steps + 1))
+            self.assertEqual(steps['points'][-1], result.score)
+        self.assertIn(DECISIONS.index('explore'), trace.steps['decision'])
+
+    def test_actions_replay(self):
+        self.record(range(10), 'naive')
+        trace = TraceReader(self.path)
+        for i in range(len(trace)):
+            steps = trace.episode_steps(i)
+            environment = Environment.from_layout(trace.episodes[i]['layout'], True)
+            percepts = [pack_percepts(environment.get_percepts())]
+            percepts += [pack_percepts(environment.get_percepts(a)) for a in trace.actions(i)]
+            np.testing.assert_array_equal(steps['percepts'], percepts)
+
+    def test_append_and_columns(self):
+        self.record(range(3))
+        self.record(range(3, 5), append=True)
+        trace = TraceReader(self.path, columns=('episode', 'score'))
+        self.assertEqual(trace.steps.dtype.names, ('episode',))
+        self.assertEqual(trace.episodes.dtype.names, ('episode', 'score'))
+        np.testing.assert_array_equal(trace.episodes['episode'], np.arange(5))
+
+        with self.assertRaises(ValueError):
+            TraceWriter(self.path, 5, 5, append=True)
+
+    def test_truncated_file(self):
+        self.record(range(10), chunk_size=16)
+        complete = TraceReader(self.path)
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 10)
+        trace = TraceReader(self.path)
+        self.assertLess(len(trace), len(complete))
+        # Bytes, proba is NaN in some steps
+        self.assertEqual(trace.steps.tobytes(), complete.steps[:len(trace.steps)].tobytes())
+
+        # Appending overwrites the torn chunk
+        self.record(range(10, 12), append=True)
+        appended = TraceReader(self.path)
+        self.assertEqual(appended.end, os.path.getsize(self.path))
+        self.assertEqual(len(appended), len(trace) + 2)
+        # Ids continue after the steps kept, whose episode records were torn
+        start = max(len(trace), int(trace.steps['episode'].max()) + 1)
+        np.testing.assert_array_equal(appended.episodes['episode'],
+                                      list(range(len(trace))) + [start, start + 1])
+        self.assertEqual(appended.steps[:len(trace.steps)].tobytes(), trace.steps.tobytes())
+        self.assertEqual(appended.episodes[-1]['score'],
+                         Episode(False, seed=11).play('proba_agent').score)
+
+    def test_append_after_crash(self):
+        # Without a final flush the last steps chunks have no episode records
+        with TraceWriter(self.path, 4, 4) as writer:
+            recorder = TraceRecorder(writer, chunk_size=64)
+            for seed in range(15):
+                Episode(False, seed=seed).play('proba_agent', recorder)
+        crashed = TraceReader(self.path)
+        orphans = int(crashed.steps['episode'].max()) + 1
+        self.assertGreater(orphans, len(crashed))
+
+        result, = self.record([20], append=True)
+        trace = TraceReader(self.path)
+        self.assertEqual(trace.episodes[-1]['episode'], orphans)
+        np.testing.assert_array_equal(trace.episode_steps(orphans)['step'],
+                                      np.arange(result.steps + 1))
+        self.assertEqual(len(trace.episode_steps(len(crashed))),
+                         len(crashed.episode_steps(len(crashed))))
+
+    def test_unknown_chunk(self):
+        self.record(range(2))
+        end = TraceReader(self.path).end
+        with open(self.path, 'ab') as f:
+            f.write(b'\0\0\5\0' + bytes(40))
+        trace = TraceReader(self.path)
+        self.assertEqual(len(trace), 2)
+        self.assertEqual(trace.end, end)
+
+    def test_take(self):
+        recorder = TraceRecorder()
+        for seed in range(4):
+            Episode(False, seed=seed).play('naive', recorder)
+        steps, episodes = recorder.take()
+        self.assertEqual(len(episodes), 4)
+
+        with TraceWriter(self.path, 4, 4) as writer:
+            writer.write(steps, episodes)
+            writer.write(steps, episodes)
+        trace = TraceReader(self.path)
+        np.testing.assert_array_equal(trace.episodes['episode'], np.arange(8))
+        np.testing.assert_array_equal(trace.episode_steps(5)['points'],
+                                      steps[steps['episode'] == 1]['points'])
+
+
+if __name__ == '__main__':
+    unittest.main()
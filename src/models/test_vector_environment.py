@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from .batch_environment import FORWARD, TURN_LEFT, CLIMB, NOOP
+from .environment import PERCEPTS
+from .vector_environment import VectorEnvironment
+
+
+class TestVectorEnvironment(unittest.TestCase):
+    def setUp(self):
+        self.env = VectorEnvironment(64, max_steps=20, seed=0)
+
+    def test_reset(self):
+        observations, info = self.env.reset(seed=1)
+        self.assertEqual(observations.shape, (64, len(PERCEPTS)))
+        self.assertEqual(observations.dtype, bool)
+
+        # Same seed, same worlds
+        pits = self.env.batch.pits.copy()
+        self.env.reset(seed=1)
+        self.assertTrue(np.array_equal(pits, self.env.batch.pits))
+
+    def test_truncation(self):
+        self.env.reset(seed=2)
+        turns = np.full(64, TURN_LEFT)
+        for _ in range(19):
+            _, _, terminated, truncated, info = self.env.step(turns)
+            self.assertFalse(truncated.any())
+        _, _, terminated, truncated, info = self.env.step(turns)
+        self.assertTrue(truncated.all())
+        self.assertFalse(terminated.any())
+        self.assertTrue(np.array_equal(info["final_points"], np.full(64, -20)))
+        self.assertTrue((self.env.steps == 0).all())
+        self.assertTrue((self.env.batch.points == 0).all())
+
+    def test_auto_reset(self):
+        self.env = VectorEnvironment(64, allow_climb_without_gold=True, seed=3)
+        self.env.reset()
+        actions = np.full(64, NOOP)
+        actions[:32] = CLIMB
+        observations, rewards, terminated, truncated, info = self.env.step(actions)
+        self.assertTrue(terminated[:32].all())
+        self.assertFalse(terminated[32:].any())
+        self.assertTrue(np.array_equal(info["_final"], terminated))
+        self.assertEqual(len(info["final_points"]), 32)
+
+        # Finished worlds are playable again on the next step
+        self.assertFalse(self.env.batch.done().any())
+        _, rewards, _, _, _ = self.env.step(np.full(64, FORWARD))
+        self.assertTrue((rewards < 0).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
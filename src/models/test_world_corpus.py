@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from .batch_environment import BatchEnvironment, neighbours
+from .environment import Environment
+from .episode import Episode
+from .room import PIT, WUMPUS, GLITTER, BREEZE, STENCH
+from .world_corpus import WorldCorpus, generate_corpus, layouts_from_batch, write_corpus
+
+
+class TestWorldCorpus(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'worlds.bin')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        layouts = layouts_from_batch(BatchEnvironment(10, 5, 3, seed=0))
+        write_corpus(self.path, layouts, 0.2, seed=0)
+
+        corpus = WorldCorpus(self.path)
+        self.assertEqual(len(corpus), 10)
+        self.assertEqual((corpus.height, corpus.width), (3, 5))
+        self.assertEqual(corpus.seed, 0)
+        self.assertTrue(np.array_equal(corpus.layouts, layouts))
+
+    def test_generate_corpus(self):
+        generate_corpus(self.path, 1000, seed=1, chunk_size=300)
+        corpus = WorldCorpus(self.path)
+        self.assertEqual(len(corpus), 1000)
+        self.assertTrue(((corpus.layouts & WUMPUS) > 0).sum(axis=(1, 2)).tolist() == [1] * 1000)
+        self.assertFalse((corpus.layouts[:, 0, 0] & (PIT | WUMPUS | GLITTER)).any())
+
+        # Same seed, same worlds, whatever the chunks
+        other = os.path.join(self.dir.name, 'other.bin')
+        generate_corpus(other, 1000, seed=1)
+        self.assertTrue(np.array_equal(corpus.layouts, WorldCorpus(other).layouts))
+
+    def test_environment(self):
+        generate_corpus(self.path, 5, seed=2)
+        corpus = WorldCorpus(self.path)
+        cells = corpus.environment(3).cells
+        self.assertTrue(np.array_equal(cells & (PIT | WUMPUS | GLITTER), corpus[3]))
+
+        # Breeze and stench are derived from the layout
+        pits = (corpus[3] & PIT > 0)[None]
+        wumpus = (corpus[3] & WUMPUS > 0)[None]
+        self.assertTrue(np.array_equal(cells & BREEZE > 0, neighbours(pits)[0]))
+        self.assertTrue(np.array_equal(cells & STENCH > 0, neighbours(wumpus)[0]))
+
+    def test_not_a_corpus(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 100)
+        with self.assertRaises(ValueError):
+            WorldCorpus(self.path)
+
+
+class TestSeeding(unittest.TestCase):
+    def test_environment_seed(self):
+        self.assertTrue(np.array_equal(Environment(seed=3).cells, Environment(seed=3).cells))
+
+    def test_episode_seed(self):
+        results = [Episode(False, seed=4).play('naive') for _ in range(2)]
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from .room import PIT, WUMPUS, GLITTER, BREEZE, STENCH, VISITED
+from .world_generator import draw_layouts, draw_placements, layouts_to_cells, pit_count
+
+
+class TestWorldGenerator(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+
+    def test_draw_placements(self):
+        pit_cells, wumpus_cell, gold_cell = draw_placements(self.rng, 1000, 4, 5, 3)
+        cells = np.column_stack([pit_cells, wumpus_cell, gold_cell])
+        self.assertEqual(cells.shape, (1000, 5))
+        self.assertTrue((cells > 0).all())
+        self.assertTrue((cells < 20).all())
+        self.assertTrue(all(len(set(row)) == 5 for row in cells.tolist()))
+
+        # Every other cell is drawn
+        self.assertEqual(set(wumpus_cell.tolist()), set(range(1, 20)))
+
+    def test_too_small(self):
+        with self.assertRaises(ValueError):
+            draw_placements(self.rng, 1, 2, 2, 2)
+
+    def test_draw_layouts(self):
+        layouts = draw_layouts(self.rng, 100, 6, 3, 0.2)
+        self.assertEqual(layouts.shape, (100, 6, 3))
+        self.assertEqual(layouts.dtype, np.uint8)
+        counts = [np.count_nonzero(layouts & flag, axis=(1, 2)) for flag in (PIT, WUMPUS, GLITTER)]
+        self.assertTrue((counts[0] == pit_count(6, 3, 0.2)).all())
+        self.assertTrue((counts[1] == 1).all())
+        self.assertTrue((counts[2] == 1).all())
+
+    def test_layouts_to_cells(self):
+        layout = np.zeros((1, 3, 4), dtype=np.uint8)
+        layout[0, 1, 1] = PIT
+        layout[0, 2, 3] = WUMPUS
+        layout[0, 0, 3] = GLITTER
+        cells = layouts_to_cells(layout)[0]
+
+        breeze = {tuple(c) for c in np.argwhere(cells & BREEZE)}
+        self.assertEqual(breeze, {(0, 1), (2, 1), (1, 0), (1, 2)})
+        stench = {tuple(c) for c in np.argwhere(cells & STENCH)}
+        self.assertEqual(stench, {(1, 3), (2, 2)})
+        self.assertEqual(cells[0, 0], VISITED)
+        self.assertEqual(cells[1, 1], PIT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,330 @@
+import os
+
+import numpy as np
+
+from .batch_environment import ACTIONS, NOOP
+from .environment import pack_percepts
+from .episode import EpisodeObserver
+from .world_corpus import LAYOUT_FLAGS
+
+
+# File layout: a HEADER_SIZE byte header, then chunks appended one after the
+# other. A chunk is a CHUNK header followed by the columns of count records,
+# one field of STEP or of episode_dtype after the other. A chunk cut short,
+# e.g. by a crash while writing, ends the file; appending to the file
+# overwrites it.
+MAGIC = b'WUMPTRCE'
+VERSION = 1
+HEADER_SIZE = 64
+
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u2'),
+    ('height', '<u2'),
+    ('width', '<u2'),
+])
+
+CHUNK = np.dtype([('kind', 'S4'), ('count', '<u8')])
+STEPS_CHUNK = b'STEP'
+EPISODES_CHUNK = b'EPIS'
+
+# One record per observation: the initial one with action NOOP, then one
+# per action with the percepts, location, orientation and points that
+# followed it. decision, target_row/col and proba describe the agent's
+# decision attribute when it chose the action, see ProbaAgent.decision.
+STEP = np.dtype([
+    ('episode', '<u4'),
+    ('step', '<u4'),
+    ('action', 'i1'),  # batch_environment action code
+    ('percepts', 'u1'),  # environment.*_BIT
+    ('row', '<u2'),
+    ('col', '<u2'),
+    ('orientation', 'u1'),
+    ('points', '<i4'),
+    ('decision', 'u1'),  # index in DECISIONS
+    ('target_row', '<i2'),  # -1 if none
+    ('target_col', '<i2'),
+    ('proba', '<f4'),  # NaN if none
+])
+
+DECISIONS = ('', 'planned', 'grab', 'shoot', 'home', 'explore')
+OUTCOMES = ('died', 'exited', 'max_steps')
+
+_ACTION_CODES = {a: i for i, a in enumerate(ACTIONS)}
+_DECISION_CODES = {d: i for i, d in enumerate(DECISIONS)}
+_OUTCOME_CODES = {o: i for i, o in enumerate(OUTCOMES)}
+
+
+def episode_dtype(height, width):
+    """
+    One record per episode, layout holding the PIT, WUMPUS and GLITTER
+    flags of the world at the start
+    """
+    return np.dtype([
+        ('episode', '<u4'),
+        ('agent', 'S32'),
+        ('score', '<i4'),
+        ('steps', '<u4'),
+        ('outcome', 'u1'),  # index in OUTCOMES
+        ('gold_grabbed', '?'),
+        ('arrow_used', '?'),
+        ('pit_proba', '<f8'),  # the agent's prior
+        ('layout', 'u1', (height, width)),
+    ])
+
+
+class TraceWriter:
+    """
+    Appends chunks of step and episode records to a trace file
+    """
+
+    def __init__(self, path, height, width, append=False):
+        """
+        With append, records are added to an existing trace of the same
+        world size, episode ids continuing after its last one
+        """
+        self.path = path
+        self.height = height
+        self.width = width
+        self.episode_count = 0
+
+        if append and os.path.exists(path) and os.path.getsize(path) > 0:
+            trace = TraceReader(path, columns=('episode',))
+            if (trace.height, trace.width) != (height, width):
+                raise ValueError(f"{path} holds {trace.height}x{trace.width} worlds, "
+                                 f"not {height}x{width}")
+            # Steps of episodes whose record was lost in a crash keep their ids
+            self.episode_count = max(len(trace.episodes), int(trace.steps['episode'].max()) + 1
+                                     if len(trace.steps) else 0)
+            # Drop a torn chunk left at the end, it would hide what follows
+            with open(path, 'r+b') as f:
+                f.truncate(trace.end)
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(path, 'wb')
+            header = np.zeros(1, dtype=HEADER)
+            header[0] = (MAGIC, VERSION, height, width)
+            self._file.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_chunk(self, kind, records):
+        if len(records) == 0:
+            return
+        chunk = np.zeros(1, dtype=CHUNK)
+        chunk[0] = (kind, len(records))
+        self._file.write(chunk.tobytes())
+        for name in records.dtype.names:
+            self._file.write(np.ascontiguousarray(records[name]).tobytes())
+
+    def write_steps(self, steps):
+        self._write_chunk(STEPS_CHUNK, steps)
+
+    def write_episodes(self, episodes):
+        self._write_chunk(EPISODES_CHUNK, episodes)
+        self.episode_count += len(episodes)
+
+    def write(self, steps, episodes):
+        """
+        Write records taken from a TraceRecorder without writer, e.g. in a
+        worker process, their episode ids shifted after those written
+        """
+        steps = steps.copy()
+        episodes = episodes.copy()
+        steps['episode'] += self.episode_count
+        episodes['episode'] += self.episode_count
+        self.write_steps(steps)
+        self.write_episodes(episodes)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class TraceRecorder(EpisodeObserver):
+    """
+    Records the steps and the result of the episodes it observes. Records
+    are buffered chunk_size at a time, then written to writer, or kept in
+    memory until take() without one.
+
+        with TraceWriter('trace.bin', 4, 4) as writer:
+            recorder = TraceRecorder(writer)
+            for seed in range(100):
+                Episode(False, seed=seed).play('proba_agent', observer=recorder)
+            recorder.flush()
+    """
+
+    def __init__(self, writer=None, height=4, width=4, chunk_size=1 << 16):
+        """
+        height and width are those of the writer if given
+        """
+        if writer is not None:
+            height, width = writer.height, writer.width
+        self.writer = writer
+        self._steps = np.zeros(chunk_size, dtype=STEP)
+        self._episodes = np.zeros(max(1, chunk_size // 16), dtype=episode_dtype(height, width))
+        self._n_steps = 0
+        self._n_episodes = 0
+        self._kept = ([], [])
+
+        self._next_episode = writer.episode_count if writer is not None else 0
+        self._episode = None
+        self._layout = None
+        self._action = NOOP
+        self._decision = None
+
+    def on_percepts(self, episode, percepts):
+        if episode.steps == 0:
+            # Gold is taken out of the cells once grabbed, keep the start
+            self._layout = episode.environment.cells & LAYOUT_FLAGS
+            self._episode = self._next_episode
+            self._next_episode += 1
+            self._action = NOOP
+            self._decision = None
+
+        if self._decision is None:
+            decision, target_row, target_col, proba = 0, -1, -1, np.nan
+        else:
+            kind, target, proba = self._decision
+            decision = _DECISION_CODES[kind]
+            target_row, target_col = target if target is not None else (-1, -1)
+            proba = np.nan if proba is None else proba
+
+        state = episode.agent_state
+        row, col = state.location
+        self._steps[self._n_steps] = (
+            self._episode, episode.steps, self._action, pack_percepts(percepts), row, col,
+            state.orientation, state.points(), decision, target_row, target_col, proba)
+        self._n_steps += 1
+        if self._n_steps == len(self._steps):
+            self._flush_steps()
+
+    def on_action(self, episode, action):
+        self._action = _ACTION_CODES.get(action, NOOP)
+        self._decision = getattr(episode.agent, 'decision', None)
+
+    def on_end(self, episode, result):
+        self._episodes[self._n_episodes] = (
+            self._episode, str(episode.agent_type).encode(), result.score, result.steps,
+            _OUTCOME_CODES[result.outcome], result.gold_grabbed, result.arrow_used,
+            episode.pit_proba, self._layout)
+        self._n_episodes += 1
+        if self._n_episodes == len(self._episodes):
+            self.flush()
+
+    def _flush_steps(self):
+        steps = self._steps[:self._n_steps]
+        if self.writer is not None:
+            self.writer.write_steps(steps)
+        elif len(steps):
+            self._kept[0].append(steps.copy())
+        self._n_steps = 0
+
+    def flush(self):
+        """
+        Write the buffered records, episodes after their steps
+        """
+        self._flush_steps()
+        episodes = self._episodes[:self._n_episodes]
+        if self.writer is not None:
+            self.writer.write_episodes(episodes)
+        elif len(episodes):
+            self._kept[1].append(episodes.copy())
+        self._n_episodes = 0
+
+    def take(self):
+        """
+        (steps, episodes) recorded without writer since the last call, episode
+        ids counting from 0 for the first episode recorded
+        """
+        self.flush()
+        steps = np.concatenate(self._kept[0]) if self._kept[0] else self._steps[:0].copy()
+        episodes = np.concatenate(self._kept[1]) if self._kept[1] else self._episodes[:0].copy()
+        self._kept = ([], [])
+        return steps, episodes
+
+
+class TraceReader:
+    """
+    steps and episodes records of a trace file, only the given columns if
+    columns is set. end is the offset after the last complete chunk.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        with open(path, 'rb') as f:
+            data = f.read(HEADER_SIZE)
+            header = np.frombuffer(data, dtype=HEADER, count=1) if len(data) == HEADER_SIZE else []
+            if len(header) == 0 or header[0]['magic'] != MAGIC:
+                raise ValueError(f"{path} is not an episode trace")
+            if header[0]['version'] != VERSION:
+                raise ValueError(f"Unsupported episode trace version {header[0]['version']}")
+            self.height = int(header[0]['height'])
+            self.width = int(header[0]['width'])
+
+            dtypes = {STEPS_CHUNK: STEP, EPISODES_CHUNK: episode_dtype(self.height, self.width)}
+            chunks = {STEPS_CHUNK: [], EPISODES_CHUNK: []}
+            self.end = HEADER_SIZE
+            for kind, records in self._read_chunks(f, dtypes, columns, os.path.getsize(path)):
+                chunks[kind].append(records)
+                self.end = f.tell()
+
+        selected = {kind: self._select(dtype, columns) for kind, dtype in dtypes.items()}
+        self.steps, self.episodes = (
+            np.concatenate(chunks[kind]) if chunks[kind] else np.zeros(0, dtype=selected[kind])
+            for kind in (STEPS_CHUNK, EPISODES_CHUNK))
+
+    @staticmethod
+    def _select(dtype, columns):
+        if columns is None:
+            return dtype
+        return np.dtype([(name, dtype.fields[name][0]) for name in dtype.names if name in columns])
+
+    def _read_chunks(self, f, dtypes, columns, file_size):
+        """
+        Complete chunks from the current offset. Reading stops at a chunk
+        cut short or an unknown kind, leaving f after the last complete chunk.
+        """
+        while True:
+            start = f.tell()
+            chunk = f.read(CHUNK.itemsize)
+            if len(chunk) < CHUNK.itemsize:
+                break
+            kind, count = np.frombuffer(chunk, dtype=CHUNK)[0]
+            count = int(count)
+            dtype = dtypes.get(bytes(kind))
+            if dtype is None or start + CHUNK.itemsize + count * dtype.itemsize > file_size:
+                break
+            records = np.zeros(count, dtype=self._select(dtype, columns))
+            for name in dtype.names:
+                field = dtype.fields[name][0]
+                size = count * field.itemsize
+                if name not in records.dtype.names:
+                    f.seek(size, os.SEEK_CUR)
+                    continue
+                records[name] = np.frombuffer(f.read(size), dtype=field.base).reshape(
+                    (count,) + field.shape)
+            yield bytes(kind), records
+        f.seek(start)
+
+    def __len__(self):
+        return len(self.episodes)
+
+    def episode_steps(self, episode):
+        """
+        Step records of an episode id, in order
+        """
+        return self.steps[self.steps['episode'] == episode]
+
+    def actions(self, episode):
+        """
+        Action characters played in an episode
+        """
+        codes = self.episode_steps(episode)['action']
+        return [ACTIONS[code] for code in codes if code != NOOP]
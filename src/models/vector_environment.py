@@ -0,0 +1,75 @@
+import numpy as np
+
+from .batch_environment import BatchEnvironment, NOOP
+from .environment import PERCEPTS
+
+
+def percepts_to_observations(percepts):
+    """
+    (N, len(PERCEPTS)) boolean array from the percepts dict of BatchEnvironment
+    """
+    return np.stack([percepts[name] for name in PERCEPTS], axis=1)
+
+
+class VectorEnvironment:
+    """
+    Gym-style reset/step over a BatchEnvironment. Worlds whose episode ends
+    are redrawn in place on the same step, so all N worlds stay busy.
+
+    step returns the first observation of the new world for those worlds;
+    the last observation and score of the finished episode are in info.
+    """
+
+    def __init__(self, n_worlds, width=4, height=4, pit_prob=0.2,
+                 allow_climb_without_gold=False, max_steps=None, seed=None):
+        self.batch = BatchEnvironment(n_worlds, width, height, pit_prob,
+                                      allow_climb_without_gold, seed)
+        self.n_worlds = n_worlds
+        self.max_steps = max_steps
+        self.steps = np.zeros(n_worlds, dtype=np.int64)
+
+    def reset(self, seed=None):
+        """
+        Draw new worlds for every slot. Returns (observations, info)
+        """
+        self.batch.reset(seed)
+        self.steps[:] = 0
+        return percepts_to_observations(self.batch.observe()), {}
+
+    def step(self, actions):
+        """
+        Apply one action code per world, see batch_environment.ACTIONS.
+
+        Returns (observations, rewards, terminated, truncated, info). For the
+        worlds that were reset, info holds "final_observation" and
+        "final_points" of the finished episode, "episode_steps" its length,
+        and "_final" marks them.
+        """
+        actions = np.asarray(actions)
+        percepts, rewards = self.batch.step(actions)
+        self.steps += actions != NOOP
+
+        terminated = self.batch.done()
+        truncated = ~terminated
+        if self.max_steps is None:
+            truncated[:] = False
+        else:
+            truncated &= self.steps >= self.max_steps
+
+        observations = percepts_to_observations(percepts)
+        final = terminated | truncated
+        info = {"_final": final}
+
+        finished = np.flatnonzero(final)
+        if len(finished):
+            info["final_observation"] = observations[finished]
+            info["final_points"] = self.batch.points[finished].copy()
+            info["episode_steps"] = self.steps[finished].copy()
+
+            self.batch.reset(worlds=finished)
+            self.steps[finished] = 0
+            # Percepts on the start cell of the new worlds, bump and scream off
+            start = percepts_to_observations(self.batch.observe())
+            observations[finished] = start[finished]
+
+        return observations, rewards, terminated, truncated, info
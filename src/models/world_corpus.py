@@ -0,0 +1,101 @@
+import numpy as np
+
+from .environment import Environment
+from .world_generator import draw_layouts
+from .room import PIT, WUMPUS, GLITTER
+
+
+# File layout: a HEADER_SIZE byte header followed by count * height * width
+# uint8 cells holding the PIT, WUMPUS and GLITTER flags of each world, row 0
+# first as in Environment.cells
+MAGIC = b'WUMPWRLD'
+VERSION = 1
+HEADER_SIZE = 64
+
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('version', '<u2'),
+    ('height', '<u2'),
+    ('width', '<u2'),
+    ('count', '<u8'),
+    ('pit_prob', '<f8'),
+    ('seed', '<i8'),  # -1 if unknown
+])
+
+LAYOUT_FLAGS = PIT | WUMPUS | GLITTER
+
+# Cells drawn at once by generate_corpus, draw_layouts keeps about 16 bytes
+# of temporaries per cell
+CHUNK_CELLS = 1 << 24
+
+
+def layouts_from_batch(batch):
+    """
+    (N, H, W) uint8 layouts of the worlds of a BatchEnvironment
+    """
+    return (batch.pits * PIT | batch.wumpus * WUMPUS | batch.gold * GLITTER).astype(np.uint8)
+
+
+def _write_header(f, height, width, count, pit_prob, seed):
+    header = np.zeros(1, dtype=HEADER)
+    header[0] = (MAGIC, VERSION, height, width, count, pit_prob, -1 if seed is None else seed)
+    f.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+
+
+def write_corpus(path, layouts, pit_prob, seed=None):
+    """
+    Write (N, H, W) layouts to path
+    """
+    layouts = np.ascontiguousarray(layouts, dtype=np.uint8) & LAYOUT_FLAGS
+    count, height, width = layouts.shape
+    with open(path, 'wb') as f:
+        _write_header(f, height, width, count, pit_prob, seed)
+        f.write(layouts.tobytes())
+
+
+def generate_corpus(path, count, width=4, height=4, pit_prob=0.2, seed=None, chunk_size=None):
+    """
+    Draw count random worlds and write them to path, chunk_size at a time,
+    by default as many as fit in CHUNK_CELLS cells
+    """
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_CELLS // (height * width))
+    rng = np.random.default_rng(seed)
+    with open(path, 'wb') as f:
+        _write_header(f, height, width, count, pit_prob, seed)
+        for start in range(0, count, chunk_size):
+            n = min(chunk_size, count - start)
+            f.write(draw_layouts(rng, n, height, width, pit_prob).tobytes())
+
+
+class WorldCorpus:
+    """
+    Read-only, memory-mapped view of a corpus file. Layouts are loaded
+    from disk on access, so worker processes can share large corpora.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header[0]['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a world corpus")
+        header = header[0]
+        if header['version'] != VERSION:
+            raise ValueError(f"Unsupported world corpus version {header['version']}")
+
+        self.height = int(header['height'])
+        self.width = int(header['width'])
+        self.pit_prob = float(header['pit_prob'])
+        self.seed = None if header['seed'] < 0 else int(header['seed'])
+        self.layouts = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER_SIZE,
+                                 shape=(int(header['count']), self.height, self.width))
+
+    def __len__(self):
+        return len(self.layouts)
+
+    def __getitem__(self, index):
+        return self.layouts[index]
+
+    def environment(self, index, allowClimbWithoutGold=False, debug=False):
+        return Environment.from_layout(
+            self.layouts[index], allowClimbWithoutGold, self.pit_prob, debug)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from .room import PIT, WUMPUS, GLITTER, BREEZE, STENCH, VISITED
+
+
+def pit_count(height, width, pit_prob):
+    """
+    Pits in every world, a share pit_prob of the cells other than (0, 0)
+    """
+    return int(pit_prob * (height * width - 1))
+
+
+def neighbours(mask):
+    """
+    Returns cells that are 4-adjacent to any True cell of mask (N, H, W)
+    """
+    result = np.zeros_like(mask)
+    result[:, 1:, :] |= mask[:, :-1, :]
+    result[:, :-1, :] |= mask[:, 1:, :]
+    result[:, :, 1:] |= mask[:, :, :-1]
+    result[:, :, :-1] |= mask[:, :, 1:]
+    return result
+
+
+def draw_placements(rng, n, height, width, pits):
+    """
+    Flat cell indices of the hazards of n worlds: (pit_cells (n, pits),
+    wumpus_cell (n,), gold_cell (n,)). Cell 0 is never drawn and no two
+    of them share a cell.
+    """
+    size = height * width
+    if pits + 2 > size - 1:
+        raise ValueError("Grid too small for pits, wumpus and gold")
+
+    # Random keys in [0, 1); cell 0 gets a key of 2 so it is never drawn.
+    # The first pits cells of the ordering are pits, then wumpus, then gold.
+    keys = rng.random((n, size))
+    keys[:, 0] = 2
+    order = np.argsort(keys, axis=1)
+    return order[:, :pits], order[:, pits], order[:, pits + 1]
+
+
+def draw_layouts(rng, n, height, width, pit_prob):
+    """
+    (n, height, width) uint8 layouts with the PIT, WUMPUS and GLITTER flags
+    """
+    pit_cells, wumpus_cell, gold_cell = draw_placements(
+        rng, n, height, width, pit_count(height, width, pit_prob))
+
+    layouts = np.zeros((n, height * width), dtype=np.uint8)
+    np.put_along_axis(layouts, pit_cells, PIT, axis=1)
+    rows = np.arange(n)
+    layouts[rows, wumpus_cell] |= WUMPUS
+    layouts[rows, gold_cell] |= GLITTER
+    return layouts.reshape(n, height, width)
+
+
+def layouts_to_cells(layouts):
+    """
+    Environment cells of (n, height, width) layouts: BREEZE and STENCH
+    around the hazards, (0, 0) VISITED
+    """
+    layouts = np.asarray(layouts, dtype=np.uint8)
+    cells = layouts & (PIT | WUMPUS | GLITTER)
+    cells |= neighbours(layouts & PIT > 0).view(np.uint8) * np.uint8(BREEZE)
+    cells |= neighbours(layouts & WUMPUS > 0).view(np.uint8) * np.uint8(STENCH)
+    cells[:, 0, 0] |= VISITED
+    return cells
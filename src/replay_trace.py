@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+
+from models.replay import Replay
+from models.trace import TraceReader, DECISIONS, OUTCOMES
+
+
+def print_episodes(trace, limit):
+    print(f"{len(trace)} episodes")
+    for episode in trace.episodes[:limit]:
+        print(f"  {episode['episode']:>8} {episode['agent'].decode():<16} "
+              f"{OUTCOMES[episode['outcome']]:<10} score {episode['score']:>6} "
+              f"steps {episode['steps']:>4}")
+
+
+def describe_decision(decision):
+    if decision is None:
+        return "-"
+    kind, target, proba = decision
+    return f"{kind} {target} {'' if proba is None else f'{proba:.3f}'}"
+
+
+def print_step(replay):
+    replay.environment.print_grid()
+    print(json.dumps(replay.state(), indent=2))
+    if replay.recorded is not None and replay.step < len(replay):
+        record = replay.recorded[replay.step + 1]
+        print(f"next action {replay.actions[replay.step]}, decided as "
+              f"{DECISIONS[record['decision']] or '-'} target "
+              f"({record['target_row']}, {record['target_col']}) proba {record['proba']:.3f}")
+
+
+def print_rerun(replay, rerun, recorded_result):
+    print(f"recorded: {recorded_result}")
+    print(f"rerun:    {rerun.result}")
+    if rerun.divergence is None:
+        print("The agent chose the recorded action at every step")
+        return
+    step = rerun.divergence
+    recorded = replay.actions[step] if step < len(replay) else None
+    chosen = rerun.chosen[step] if step < len(rerun.chosen) else None
+    print(f"First divergence at step {step}: recorded {recorded}, agent chose {chosen} "
+          f"({describe_decision(rerun.decisions[step] if chosen else None)})")
+
+
+def main(path, episode=None, step=None, rerun=None, agent_params=None, limit=20) -> int:
+    trace = TraceReader(path)
+    if episode is None:
+        print_episodes(trace, limit)
+        return 0
+
+    replay = Replay.from_trace(trace, episode)
+    replay.seek(len(replay) if step is None else step)
+    print_step(replay)
+
+    if rerun:
+        record = trace.episodes[trace.episodes['episode'] == episode][0]
+        recorded_result = (f"{OUTCOMES[record['outcome']]}, score {record['score']}, "
+                           f"{record['steps']} steps")
+        print_rerun(replay, replay.rerun(rerun, replay.step, agent_params), recorded_result)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Inspect an episode trace written by benchmark.py --trace")
+    parser.add_argument('trace')
+    parser.add_argument('episode', type=int, nargs='?',
+                        help="episode to replay, lists the episodes if not given")
+    parser.add_argument('--step', type=int, default=None,
+                        help="step to show, negative counting from the end, the last by default")
+    parser.add_argument('--rerun', metavar='AGENT',
+                        help="rerun an agent type on the episode from --step")
+    parser.add_argument('--agent-params', type=json.loads, default=None,
+                        help="JSON object of factory parameters of the rerun agent")
+    parser.add_argument('--limit', type=int, default=20, help="episodes listed")
+    args = parser.parse_args()
+
+    sys.exit(main(args.trace, args.episode, args.step, args.rerun, args.agent_params, args.limit))
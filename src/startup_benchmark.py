@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# What a short-lived worker runs: import, build an episode and take one step
+EPISODE_CODE = "from models.episode import Episode; Episode(False, seed=0).play({agent!r}, max_steps=1)"
+
+
+def run_python(code, importtime=False):
+    """
+    Wall time of a fresh interpreter running code, and the stderr of
+    -X importtime if asked
+    """
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    process = subprocess.run(command, cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, process.stderr
+
+
+def slowest_imports(importtime_log, count):
+    """
+    Top-level modules with the largest cumulative import time, in ms
+    """
+    imports = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Only modules imported directly by the code, not nested ones
+        if not name.startswith('  ', 1):
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: -item[1])[:count]
+
+
+def cold_start(agent, repeats, imports=0):
+    code = EPISODE_CODE.format(agent=agent) if agent else "pass"
+    times = [run_python(code)[0] for _ in range(repeats)]
+    row = {
+        'agent': agent or '(interpreter)',
+        'median_seconds': statistics.median(times),
+        'min_seconds': min(times),
+    }
+    if imports:
+        row['slowest_imports_ms'] = dict(slowest_imports(run_python(code, True)[1], imports))
+    return row
+
+
+def main(agents, repeats, imports, json_path) -> int:
+    report = [cold_start(None, repeats)] + [cold_start(a, repeats, imports) for a in agents]
+
+    for row in report:
+        print(f"{row['agent']:<16} median {row['median_seconds'] * 1000:7.1f} ms  "
+              f"min {row['min_seconds'] * 1000:7.1f} ms")
+        for name, ms in row.get('slowest_imports_ms', {}).items():
+            print(f"    {name:<40} {ms:7.1f} ms")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Cold start time of a fresh interpreter playing one step per agent type")
+    parser.add_argument('agents', nargs='?', default='naive,move_planning,proba_agent',
+                        help="comma separated agent types")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--imports', type=int, default=5,
+                        help="slowest top-level imports to list per agent")
+    parser.add_argument('--json', dest='json_path')
+    args = parser.parse_args()
+
+    sys.exit(main(args.agents.split(','), args.repeats, args.imports, args.json_path))